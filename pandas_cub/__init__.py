@@ -1,7 +1,76 @@
+import re
+from functools import lru_cache
+
 import numpy as np
 
 __version__ = '0.0.1'
 
+# number of rows evaluated at a time by `DataFrame.eval`
+_EVAL_BLOCK_SIZE = 2 ** 16
+
+# global options, see `set_option`
+_options = {'workers': 1, 'parallel_threshold': 1_000_000}
+
+# thread pool shared by every DataFrame, created on first use
+_executor = None
+
+
+def set_option(name, value):
+    """
+    Sets a global option
+
+    Parameters
+    ----------
+    name: str of option name
+        'workers': int of threads running per-column work in
+            aggregations, non-aggregation methods and operators.
+            1 runs everything serially
+        'parallel_threshold': int of the minimum number of values,
+            rows times columns, for the work to use the threads
+    value: int of new value
+
+    Returns
+    -------
+    None
+    """
+    global _executor
+    if name not in _options:
+        raise KeyError(f'Unknown option `{name}`')
+    if not isinstance(value, int) or value < (1 if name == 'workers' else 0):
+        raise ValueError(f'Invalid value for option `{name}`')
+    if name == 'workers' and _executor is not None:
+        _executor.shutdown()
+        _executor = None
+    _options[name] = value
+
+
+def get_option(name):
+    """
+    Returns the value of a global option. See `set_option`
+    """
+    if name not in _options:
+        raise KeyError(f'Unknown option `{name}`')
+    return _options[name]
+
+
+def _map_columns(func, df):
+    """
+    Returns `func(name, values)` for every column of `df` in column
+    order. Large frames run the columns on the shared thread pool, since
+    NumPy releases the GIL in most kernels. Like the serial loop, the
+    exception of the first failing column is raised
+    """
+    global _executor
+    items = list(df._data.items())
+    workers = _options['workers']
+    if workers > 1 and len(items) > 1 and \
+            len(items[0][1]) * len(items) >= _options['parallel_threshold']:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _executor = ThreadPoolExecutor(max_workers=workers)
+        return list(_executor.map(lambda item: func(*item), items))
+    return [func(key, val) for key, val in items]
+
 
 class DataFrame:
 
@@ -25,6 +94,12 @@ class DataFrame:
         # convert unicode arrays to object
         self._data = self._convert_unicode_to_object(data)
 
+        # bitmap indexes created with `create_bitmap_index`
+        self._bitmap_indexes = {}
+
+        # column the rows are known to be sorted on in ascending order
+        self._sorted_by = None
+
         # Allow for special methods for strings
         self.str = StringMethods(self)
         self._add_docs()
@@ -105,6 +180,11 @@ class DataFrame:
                 raise TypeError('all column names must be strings')
         if len(columns) != len(set(columns)):
             raise ValueError('list of `columns` must have no duplicates')
+        self._bitmap_indexes = {new: self._bitmap_indexes[old]
+                                for old, new in zip(self._data, columns)
+                                if old in self._bitmap_indexes}
+        if self._sorted_by is not None:
+            self._sorted_by = columns[list(self._data).index(self._sorted_by)]
         self._data = dict(zip(columns, self._data.values()))
         
 
@@ -246,9 +326,9 @@ class DataFrame:
         A subset of the original DataFrame
         """
         if isinstance(item, str):
-            return DataFrame({item:self._data[item]})
+            return self._share_indexes(DataFrame({item:self._data[item]}))
         if isinstance(item, list):\
-            return DataFrame({i:self._data[i] for i in item})
+            return self._share_indexes(DataFrame({i:self._data[i] for i in item}))
         if isinstance(item, DataFrame):
             if len(item.columns) != 1: raise ValueError('DataFrame must have one col only')
             b_arr = next(iter(list(item._data.values())))
@@ -257,6 +337,14 @@ class DataFrame:
 
 
 
+    def _share_indexes(self, df):
+        # a column selection shares its arrays, so the indexes stay valid
+        df._bitmap_indexes = {col: index for col, index in self._bitmap_indexes.items()
+                              if df._data.get(col) is self._data[col]}
+        if self._sorted_by in df._data:
+            df._sorted_by = self._sorted_by
+        return df
+
     def _getitem_tuple(self, item):
         # simultaneous selection of rows and cols -> df[rs, cs]
         pass
@@ -288,6 +376,9 @@ class DataFrame:
         if value.dtype.kind == 'U':
             value = value.astype('object')
         
+        self._bitmap_indexes.pop(key, None)
+        if key == self._sorted_by:
+            self._sorted_by = None
         self._data[key] = value
 
     def head(self, n=5):
@@ -318,6 +409,10 @@ class DataFrame:
         """
         return DataFrame({key:val[-n:] for key, val in self._data.items()})
 
+    def _take(self, indices):
+        # gathers rows by integer position without going through a list
+        return DataFrame({key:val.take(indices) for key, val in self._data.items()})
+
     #### Aggregation Methods ####
 
     def min(self):
@@ -366,12 +461,70 @@ class DataFrame:
         -------
         A DataFrame
         """
+        def func(col, val):
+            try:
+                return np.array([aggfunc(val)])
+            except TypeError:
+                return None
+
         new_data = {}
+        for col, result in zip(self._data, _map_columns(func, self)):
+            if result is not None:
+                new_data[col] = result
+        return DataFrame(new_data)
+
+    def describe(self, percentiles=(.25, .5, .75)):
+        """
+        Summarizes every numeric column with the count of non-missing
+        values, the count of missing values, the mean, the standard
+        deviation, the minimum, the requested percentiles and the
+        maximum. Missing values are skipped. The minimum, maximum and
+        all percentiles come from a single partition of each column
+
+        Parameters
+        ----------
+        percentiles: sequence of floats between 0 and 1
+
+        Returns
+        -------
+        A DataFrame with a 'statistic' column naming the rows and one
+        float column per numeric column
+        """
+        percentiles = np.asarray(percentiles, dtype='float')
+        if ((percentiles < 0) | (percentiles > 1)).any():
+            raise ValueError('`percentiles` must be between 0 and 1')
+        names = ['count', 'null_count', 'mean', 'std', 'min']
+        names += [f'{p * 100:g}%' for p in percentiles] + ['max']
+        new_data = {'statistic': np.array(names, dtype='O')}
+
         for col, val in self._data.items():
-            try: 
-                new_data[col]= np.array([aggfunc(val)])
-            except TypeError:
-                pass
+            kind = val.dtype.kind
+            if kind not in 'biuf':
+                continue
+            if kind == 'b':
+                val = val.astype('int')
+            if kind == 'f':
+                val = val[~np.isnan(val)]
+            n = len(val)
+            stats = np.full(len(names), np.nan)
+            stats[0] = n
+            stats[1] = len(self) - n
+            if n > 0:
+                mean = val.mean()
+                deviations = val - mean
+                stats[2] = mean
+                stats[3] = np.sqrt(np.dot(deviations, deviations) / n)
+
+                # linear interpolation between the two closest ranks
+                positions = percentiles * (n - 1)
+                low = np.floor(positions).astype('int')
+                high = np.ceil(positions).astype('int')
+                part = np.partition(val, np.unique(np.concatenate(([0, n - 1], low, high))))
+                part_low = part[low].astype('float')
+                stats[4] = part[0]
+                stats[5:-1] = part_low + (part[high] - part_low) * (positions - low)
+                stats[-1] = part[n - 1]
+            new_data[col] = stats
         return DataFrame(new_data)
 
     def isna(self):
@@ -390,6 +543,105 @@ class DataFrame:
                 new_data[key] = np.isnan(val)
         return DataFrame(new_data)
 
+    def isin(self, col, values):
+        """
+        Determines whether each value of a column is one of `values`.
+        The lookup is vectorized and its strategy depends on the dtype
+        and on the sizes of the column and of `values`
+
+        Parameters
+        ----------
+        col: str of column name
+        values: list, set, tuple or NumPy array of values to look for
+
+        Returns
+        -------
+        A one-column DataFrame of booleans
+        """
+        if isinstance(values, (list, set, tuple)):
+            dtype = 'O' if self._data[col].dtype.kind == 'O' else None
+            values = np.array(list(values), dtype=dtype)
+        elif not isinstance(values, np.ndarray):
+            raise TypeError('`values` must be a list, set, tuple or NumPy array')
+        index = self._bitmap_indexes.get(col)
+        if index is not None:
+            return DataFrame({col: index.unpack(index.bitmap(values.ravel()))})
+        return DataFrame({col: _isin(self._data[col], values.ravel())})
+
+    def create_bitmap_index(self, col, max_cardinality=256):
+        """
+        Builds a packed bitmap for each distinct value of a
+        low-cardinality column. Afterwards, equality comparisons and
+        `isin` on this column, as well as `bitmap_mask`, are answered
+        with bitwise operations instead of scanning the column.
+        Overwriting the column drops its index
+
+        Parameters
+        ----------
+        col: str of column name
+        max_cardinality: int
+            Maximum number of distinct values allowed in the column
+
+        Returns
+        -------
+        None
+        """
+        if col not in self._data:
+            raise KeyError(f'Column `{col}` does not exist')
+        self._bitmap_indexes[col] = _BitmapIndex(self._data[col], max_cardinality)
+
+    def drop_bitmap_index(self, col):
+        """
+        Removes the bitmap index of a column
+
+        Parameters
+        ----------
+        col: str of column name
+
+        Returns
+        -------
+        None
+        """
+        del self._bitmap_indexes[col]
+
+    def bitmap_mask(self, conditions, how='and'):
+        """
+        Combines equality conditions on bitmap-indexed columns using
+        only bitwise operations on the packed bitmaps. The result is
+        unpacked once at the end
+
+        Parameters
+        ----------
+        conditions: dict
+            Maps column names to a value or to a list of values. A list
+            matches any of its values
+        how: 'and' or 'or'
+            How the conditions of different columns are combined
+
+        Returns
+        -------
+        A one-column DataFrame of booleans that can filter rows
+        """
+        if not isinstance(conditions, dict) or not conditions:
+            raise TypeError('`conditions` must be a non-empty `dict`')
+        if how not in ('and', 'or'):
+            raise ValueError("`how` must be 'and' or 'or'")
+        combined = None
+        for col, values in conditions.items():
+            if col not in self._bitmap_indexes:
+                raise KeyError(f'Column `{col}` has no bitmap index')
+            if not isinstance(values, (list, set, tuple, np.ndarray)):
+                values = [values]
+            index = self._bitmap_indexes[col]
+            bitmap = index.bitmap(values)
+            if combined is None:
+                combined = bitmap
+            elif how == 'and':
+                combined &= bitmap
+            else:
+                combined |= bitmap
+        return DataFrame({'mask': index.unpack(combined)})
+
     def count(self):
         """
         Counts the number of non-missing values per column
@@ -404,18 +656,24 @@ class DataFrame:
             new_data[key]= len(self)-val
         return DataFrame(new_data)
 
-    def unique(self):
+    def unique(self, sort=True):
         """
         Finds the unique values of each column
 
+        Parameters
+        ----------
+        sort: bool
+            If True, the unique values are sorted, otherwise they are in
+            order of first appearance
+
         Returns
         -------
         A list of one-column DataFrames
         """
         dfs = []
-        for key, val in self._data.items():
+        for key in self._data:
             new_data = {}
-            new_data[key] = np.unique(val)
+            new_data[key] = self._factorize_column(key, sort)[1]
             dfs.append(DataFrame(new_data))
         if len(dfs)==1:
             return dfs[0]
@@ -425,42 +683,207 @@ class DataFrame:
         """
         Find the number of unique values in each column
 
+        Returns
+        -------
+        A DataFrame
+        """
+        new_data = {}
+        for key in self._data:
+            new_data[key]=np.array([len(self._factorize_column(key)[1])])
+        return DataFrame(new_data)
+
+    def approx_nunique(self, error=0.01):
+        """
+        Estimates the number of unique values in each column with a
+        HyperLogLog sketch in one pass and a few kilobytes of memory
+
+        Parameters
+        ----------
+        error: float of relative standard error of the estimate
+
+        Returns
+        -------
+        A DataFrame
+        """
+        new_data = {}
+        for key, val in self._data.items():
+            sketch = HyperLogLog(error)
+            sketch.update(val)
+            new_data[key] = np.array([sketch.estimate()])
+        return DataFrame(new_data)
+
+    def approx_quantile(self, q, k=200):
+        """
+        Estimates the q-th quantile of each numeric column with a KLL
+        sketch. Missing values are skipped
+
+        Parameters
+        ----------
+        q: float between 0 and 1
+        k: int of sketch size. Larger values are more accurate
+
         Returns
         -------
         A DataFrame
         """
         new_data = {}
         for key, val in self._data.items():
-            new_data[key]=np.array([len(np.unique(val))])
+            if val.dtype.kind in 'biuf':
+                sketch = QuantileSketch(k)
+                sketch.update(val)
+                new_data[key] = np.array([sketch.quantile(q)])
         return DataFrame(new_data)
 
-    def value_counts(self, normalize=False):
+    def value_counts(self, normalize=False, sort=True, columns=None):
         """
-        Returns the frequency of each unique value for each column
+        Returns the frequency of each unique value for each column.
+        Values are counted by hashing, or with the codes of a bitmap
+        index when the column has one, so nothing is sorted but the
+        counts
 
         Parameters
         ----------
         normalize: bool
             If True, returns the relative frequencies (percent)
+        sort: bool
+            If True, values are ordered by decreasing frequency with ties
+            in order of first appearance. Otherwise they are in order of
+            first appearance
+        columns: str or list of column names, optional
+            If given, counts the distinct combinations of values of
+            these columns and returns a single DataFrame
 
         Returns
         -------
         A list of DataFrames or a single DataFrame if one column
         """
+        if columns is not None:
+            if isinstance(columns, str):
+                columns = [columns]
+            codes, ngroups, keys = _factorize_keys([self._data[col] for col in columns],
+                                                   sort=False)
+            new_data = dict(zip(columns, keys))
+            new_data['count'] = np.bincount(codes, minlength=ngroups)
+            frames = [new_data]
+        else:
+            frames = []
+            for key in self._data:
+                codes, uniques = self._factorize_column(key)
+                frames.append({key: uniques,
+                               'count': np.bincount(codes, minlength=len(uniques))})
+
         dfs = []
-        for key, val in self._data.items():
-            uniques, counts = np.unique(val, return_counts=True)
-            order = np.argsort(-counts)
-            uniques = uniques[order]
-            counts = counts[order]
+        for new_data in frames:
+            if sort:
+                order = np.argsort(-new_data['count'], kind='stable')
+                new_data = {key: val[order] for key, val in new_data.items()}
             if normalize:
-                counts = counts/counts.sum()
-            dfs.append(DataFrame({key:uniques, 'count':counts}))
+                new_data['count'] = new_data['count'] / len(self)
+            dfs.append(DataFrame(new_data))
         if len(dfs)==1:
             return dfs[0]
         return dfs
 
-        
+    def duplicated(self, subset=None, keep='first'):
+        """
+        Finds the rows whose values repeat those of another row. Rows
+        are compared through one integer code per row, combined from
+        the codes of each column, so no tuples are built and equal codes
+        always mean equal rows
+
+        Parameters
+        ----------
+        subset: str or list of column names to compare, all columns by
+            default
+        keep: 'first', 'last' or False
+            Which occurrence of repeated rows is not a duplicate. False
+            marks every occurrence as a duplicate
+
+        Returns
+        -------
+        A one-column DataFrame of booleans
+        """
+        return DataFrame({'duplicated': self._duplicated(subset, keep)})
+
+    def drop_duplicates(self, subset=None, keep='first'):
+        """
+        Removes the rows whose values repeat those of another row
+
+        Parameters
+        ----------
+        subset: str or list of column names to compare, all columns by
+            default
+        keep: 'first', 'last' or False
+            Which occurrence of repeated rows to keep. False drops every
+            occurrence
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._take(np.flatnonzero(~self._duplicated(subset, keep)))
+
+    def hash_rows(self, columns=None):
+        """
+        Hashes the values of every row to a 64-bit integer, such as to
+        split the rows into partitions with `hash_rows() % n`. Each
+        column is hashed at once, numbers from their bit patterns and
+        strings once per distinct value, and the column hashes are
+        mixed into the row hashes one column after another. Hashes are
+        the same in every process and on every run
+
+        Parameters
+        ----------
+        columns: str or list of column names, all columns by default
+
+        Returns
+        -------
+        A NumPy array of uint64
+        """
+        if columns is None:
+            columns = self.columns
+        elif isinstance(columns, str):
+            columns = [columns]
+        hashes = np.zeros(len(self), dtype='uint64')
+        for col in columns:
+            if col not in self._data:
+                raise KeyError(f'Column `{col}` does not exist')
+            hashes = _mix64(hashes ^ _hash_array(self._data[col]))
+        return hashes
+
+    def _duplicated(self, subset, keep):
+        if subset is None:
+            subset = self.columns
+        elif isinstance(subset, str):
+            subset = [subset]
+        for col in subset:
+            if col not in self._data:
+                raise KeyError(f'Column `{col}` does not exist')
+        if keep not in ('first', 'last', False):
+            raise ValueError("`keep` must be 'first', 'last' or False")
+
+        if len(subset) == 1:
+            codes, uniques = self._factorize_column(subset[0])
+            ngroups = len(uniques)
+        else:
+            codes, ngroups, _ = _factorize_keys([self._data[col] for col in subset], sort=False)
+        groups = _Groups(codes, ngroups)
+        if keep is False:
+            return groups.counts[codes] > 1
+        kept = groups.starts if keep == 'first' else groups.starts + groups.counts - 1
+        duplicated = np.ones(len(codes), dtype='bool')
+        duplicated[groups.order[kept]] = False
+        return duplicated
+
+    def _factorize_column(self, col, sort=False):
+        # reuses the codes of a bitmap index when there is one
+        index = self._bitmap_indexes.get(col)
+        if index is None:
+            return _factorize(self._data[col], sort)
+        if not sort:
+            return index.codes, index.uniques
+        ranks, uniques = _factorize(index.uniques, sort=True)
+        return ranks[index.codes], uniques
 
     def rename(self, columns):
         """
@@ -597,13 +1020,12 @@ class DataFrame:
         -------
         A DataFrame
         """
-        new_data = {}
-        for key, val in self._data.items():
+        def func(key, val):
             if val.dtype.kind=='O':
-                new_data[key] = val.copy()
-            else:
-                new_data[key] = funcname(val, **kwargs)
-        return DataFrame(new_data)
+                return val.copy()
+            return funcname(val, **kwargs)
+
+        return DataFrame(dict(zip(self._data, _map_columns(func, self))))
 
     def diff(self, n=1):
         """
@@ -730,26 +1152,188 @@ class DataFrame:
             else:
                 other = next(iter(other._data.values()))
         
-        new_data = {}
-        for key, val in self._data.items():
+        def func(key, val):
+            index = self._bitmap_indexes.get(key)
+            if index is not None and op in ('__eq__', '__ne__') and np.ndim(other) == 0:
+                return index.unpack(index.bitmap([other]), op == '__ne__')
             fnc = getattr(val, op)
-            new_data[key]=fnc(other)
+            return fnc(other)
+
+        return DataFrame(dict(zip(self._data, _map_columns(func, self))))
+
+    def eval(self, expr):
+        """
+        Evaluates an arithmetic expression of column names in one pass.
+        The data is processed in blocks and every operator writes into
+        a reusable block-sized buffer, so no full-size temporaries
+        are allocated for the intermediate results
+
+        Parameters
+        ----------
+        expr: str
+            An expression such as '(a * 2 + b) / 3'. Write it as an
+            assignment, 'total = (a * 2 + b) / 3', to add the result
+            as a new column
+
+        Returns
+        -------
+        A DataFrame
+        """
+        import ast
+        if not isinstance(expr, str):
+            raise TypeError('`expr` must be a string')
+        tree = ast.parse(expr.strip())
+        if len(tree.body) != 1:
+            raise ValueError('`expr` must be a single expression')
+        stmt = tree.body[0]
+        if isinstance(stmt, ast.Assign):
+            if len(stmt.targets) != 1 or not isinstance(stmt.targets[0], ast.Name):
+                raise ValueError('Can only assign to a single column name')
+            name = stmt.targets[0].id
+        elif isinstance(stmt, ast.Expr):
+            name = None
+        else:
+            raise ValueError('`expr` must be an expression or an assignment')
+
+        root = _EvalNode.build(stmt.value, self._data)
+        n = len(self)
+        if root.ufunc is None:
+            out = np.array(root.operand(0, n))
+            if out.ndim == 0:
+                out = np.repeat(out, n)
+        else:
+            # a one-row evaluation finds the dtype of every operator
+            root.evaluate(0, min(n, 1))
+            out = np.empty(n, dtype=root.dtype)
+            block_size = max(min(_EVAL_BLOCK_SIZE, n), 1)
+            root.allocate(block_size)
+            for start in range(0, n, block_size):
+                stop = min(start + block_size, n)
+                root.evaluate(start, stop, out[start:stop])
+
+        if out.dtype.kind == 'U':
+            out = out.astype('object')
+        if name is None:
+            return DataFrame({expr.strip(): out})
+        new_data = dict(self._data)
+        new_data[name] = out
         return DataFrame(new_data)
 
-    def sort_values(self, by, asc=True):
+    def sort_values(self, by, asc=True, kind='stable'):
         """
-        Sort the DataFrame by one or more values
+        Sort the DataFrame by one or more values. Descending order
+        keeps tied rows in their original order when the sort is stable
 
         Parameters
         ----------
         by: str or list of column names
-        asc: boolean of sorting order
+        asc: boolean of sorting order or a list of booleans, one for
+            each column in `by`
+        kind: str of NumPy sorting algorithm used for a single column.
+            Sorting by several columns is always stable
 
         Returns
         -------
         A DataFrame
         """
-        pass
+        if isinstance(by, str):
+            by = [by]
+        elif not isinstance(by, list):
+            raise TypeError('`by` must be a str or a list')
+        if isinstance(asc, bool):
+            asc = [asc] * len(by)
+        elif not isinstance(asc, list) or len(asc) != len(by):
+            raise ValueError('`asc` must be a bool or a list the same length as `by`')
+
+        keys = [_sort_key(self._data[col]) for col in by]
+        if len(keys) == 1:
+            order = _argsort(keys[0], asc[0], kind)
+        else:
+            order = _lexsort_order(keys, asc)
+        df = self._take(order)
+        if asc[0]:
+            df._sorted_by = by[0]
+        return df
+
+    def nlargest(self, n, columns):
+        """
+        Returns the n rows with the largest values of `columns` in
+        descending order. A partition finds the winners in linear time
+        and only those rows are sorted. Ties are broken by the remaining
+        columns and then by row position
+
+        Parameters
+        ----------
+        n: int
+        columns: str or list of column names
+            The first column must be numeric
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._nselect(n, columns, largest=True)
+
+    def nsmallest(self, n, columns):
+        """
+        Returns the n rows with the smallest values of `columns` in
+        ascending order. A partition finds the winners in linear time
+        and only those rows are sorted. Ties are broken by the remaining
+        columns and then by row position
+
+        Parameters
+        ----------
+        n: int
+        columns: str or list of column names
+            The first column must be numeric
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._nselect(n, columns, largest=False)
+
+    def _nselect(self, n, columns, largest):
+        if not isinstance(n, int):
+            raise TypeError('`n` must be an int')
+        if isinstance(columns, str):
+            columns = [columns]
+        elif not isinstance(columns, list):
+            raise TypeError('`columns` must be a str or a list')
+        values = self._data[columns[0]]
+        if values.dtype.kind not in 'biuf':
+            raise TypeError('The first column of `columns` must be numeric')
+
+        # missing values never make it into the result
+        rows = np.arange(len(self))
+        if values.dtype.kind == 'f':
+            rows = np.flatnonzero(~np.isnan(values))
+            values = values[rows]
+
+        n = min(max(n, 0), len(rows))
+        if n < len(rows):
+            if n == 0:
+                return self._take(rows[:0])
+            kth = len(rows) - n if largest else n - 1
+            threshold = values[np.argpartition(values, kth)[kth]]
+            # rows tied with the threshold stay so the tiebreak can decide
+            if largest:
+                rows = rows[values >= threshold]
+            else:
+                rows = rows[values <= threshold]
+
+        keys, ascending = [], []
+        for col in columns:
+            values = self._data[col][rows]
+            missing = _missing(values)
+            # missing tiebreak values come last in both directions
+            if missing.any():
+                keys.append(missing)
+                ascending.append(True)
+            keys.append(_sort_key(values))
+            ascending.append(not largest)
+        order = _lexsort_order(keys, ascending)
+        return self._take(rows[order[:n]])
 
     def sample(self, n=None, frac=None, replace=False, seed=None):
         """
@@ -783,7 +1367,8 @@ class DataFrame:
         # return self[rows.tolist()]
 
 
-    def pivot_table(self, rows=None, columns=None, values=None, aggfunc=None):
+    def pivot_table(self, rows=None, columns=None, values=None, aggfunc=None,
+                    fill_value=None, margins=False, margins_name='All'):
         """
         Creates a pivot table from one or two 'grouping' columns.
 
@@ -793,15 +1378,211 @@ class DataFrame:
             Optional
         columns: str of column name to group by
             Optional
-        values: str of column name to aggregate
+        values: str or list of column names to aggregate
             Required
-        aggfunc: str of aggregation function
+        aggfunc: str or list of aggregation function names
+        fill_value: value of the cells that no row falls into.
+            Defaults to NaN
+        margins: bool
+            If True, adds the aggregates of every row, of every column
+            and of all the data, labeled with `margins_name`
+        margins_name: str
 
         Returns
         -------
-        A DataFrame
+        A DataFrame. When several values or aggregation functions are
+        given, the aggregated columns are named '<value>_<aggfunc>',
+        followed by '_<column>' when `columns` is given
+        """
+        if rows is None and columns is None:
+            raise ValueError('`rows` or `columns` cannot both be `None`')
+
+        if values is not None:
+            if aggfunc is None:
+                raise ValueError('You must provide `aggfunc` when `values` is provided.')
+        else:
+            if aggfunc is not None:
+                raise ValueError('You cannot provide `aggfunc` when `values` is None')
+            aggfunc = 'size'
+        value_names = values if isinstance(values, list) else [values]
+        aggfuncs = aggfunc if isinstance(aggfunc, list) else [aggfunc]
+        single = not isinstance(values, list) and not isinstance(aggfunc, list)
+
+        # each grouping column is encoded once as dense integer codes and
+        # the groups are shared by every value and aggregation function
+        n_rows = n_cols = 1
+        row_codes = col_codes = np.zeros(len(self), dtype=np.intp)
+        if rows is not None:
+            row_codes, row_uniques = _factorize(self._data[rows])
+            n_rows = len(row_uniques)
+        if columns is not None:
+            col_codes, col_uniques = _factorize(self._data[columns])
+            n_cols = len(col_uniques)
+            if margins:
+                col_uniques = np.append(col_uniques.astype('O'), margins_name)
+
+        # one group per cell of the output grid, stored column by column
+        groups = _Groups(col_codes * n_rows + row_codes, n_rows * n_cols)
+
+        new_data = {}
+        if rows is not None:
+            new_data[rows] = np.append(row_uniques.astype('O'), margins_name) \
+                if margins else row_uniques
+        for value in value_names:
+            val_data = None if value is None else self._data[value]
+            for func in aggfuncs:
+                grid = _pivot_grid(groups, val_data, func, (n_cols, n_rows), fill_value,
+                                   margins, row_codes, col_codes)
+                prefix = '' if single else f'{value}_{func}_'
+                if columns is None:
+                    new_data[func if single else f'{value}_{func}'] = grid[0]
+                elif rows is None:
+                    for i, col_name in enumerate(col_uniques):
+                        new_data[prefix + str(col_name)] = grid[i, :1]
+                else:
+                    for col_name, col_values in zip(col_uniques, grid):
+                        new_data[prefix + str(col_name)] = col_values
+        return DataFrame(new_data)
+
+    def rolling(self, window, min_periods=None):
         """
-        pass
+        Moving-window calculations over the numeric columns
+
+        Parameters
+        ----------
+        window: int of number of rows in each window, ending at the
+            current row
+        min_periods: int of minimum number of non-missing values in a
+            window to produce a result. Defaults to `window`
+
+        Returns
+        -------
+        A Rolling object
+        """
+        return Rolling(self, window, min_periods)
+
+    def expanding(self, min_periods=1):
+        """
+        Calculations over all rows up to and including each row of the
+        numeric columns
+
+        Parameters
+        ----------
+        min_periods: int of minimum number of non-missing values to
+            produce a result
+
+        Returns
+        -------
+        An Expanding object
+        """
+        return Expanding(self, min_periods)
+
+    def ewm(self, alpha=None, span=None, halflife=None, adjust=True):
+        """
+        Exponentially weighted calculations over the numeric columns.
+        Provide exactly one of `alpha`, `span` or `halflife`
+
+        Parameters
+        ----------
+        alpha: float of smoothing factor between 0 and 1
+        span: float, sets alpha to 2 / (span + 1)
+        halflife: float, sets alpha to 1 - exp(-log(2) / halflife)
+        adjust: bool
+            If True, each value is the weighted average of all previous
+            values with weights (1 - alpha) ** age. If False, the
+            recursive form y = (1 - alpha) * y + alpha * x is used
+
+        Returns
+        -------
+        An EWM object
+        """
+        return EWM(self, alpha, span, halflife, adjust)
+
+    def groupby(self, keys):
+        """
+        Groups the rows by the distinct values of one or more columns
+
+        Parameters
+        ----------
+        keys: str or list of column names
+
+        Returns
+        -------
+        A GroupBy object
+        """
+        return GroupBy(self, keys)
+
+    def merge(self, other, on, how='inner', suffixes=('_x', '_y'), presorted=False):
+        """
+        Joins the rows of this DataFrame with the rows of `other` that
+        have equal values in the `on` columns
+
+        The keys of both DataFrames are factorized together into one
+        shared space of integer codes, which takes the place of a hash
+        table. The rows of `other` are grouped by code once and every
+        row of this DataFrame is matched with the group of its code, so
+        the output columns are gathered with `take`
+
+        When both DataFrames are sorted on a single key, either from
+        `sort_values` or as stated with `presorted`, the matches are
+        found with a merge join driven by `np.searchsorted` instead,
+        which needs no factorization and memory only for the output
+
+        Parameters
+        ----------
+        other: DataFrame
+        on: str or list of column names present in both DataFrames
+        how: 'inner', 'left' or 'outer'
+            'left' also keeps the rows of this DataFrame without a match
+            and 'outer' also keeps the rows of `other` without a match.
+            Their missing values are NaN, or None for strings and booleans
+        suffixes: tuple of two str appended to the names of the non-key
+            columns present in both DataFrames
+        presorted: bool
+            If True, both DataFrames are taken to be sorted in ascending
+            order of the single `on` column
+
+        Returns
+        -------
+        A DataFrame with the rows in the order of this DataFrame,
+        followed by the unmatched rows of `other` for an outer join
+        """
+        if not isinstance(other, DataFrame):
+            raise TypeError('`other` must be a DataFrame')
+        if isinstance(on, str):
+            on = [on]
+        elif not isinstance(on, list) or not on:
+            raise TypeError('`on` must be a str or a non-empty list')
+        for key in on:
+            if key not in self._data or key not in other._data:
+                raise KeyError(f'Column `{key}` must be in both DataFrames')
+        if how not in ('inner', 'left', 'outer'):
+            raise ValueError("`how` must be 'inner', 'left' or 'outer'")
+
+        n_left = len(self)
+        keys = [np.concatenate([self._data[key], other._data[key]]) for key in on]
+        sorted_keys = len(on) == 1 and (presorted or self._sorted_by == other._sorted_by == on[0])
+        # a binary search cannot compare None with strings
+        if sorted_keys and not (keys[0].dtype.kind == 'O' and _missing(keys[0]).any()):
+            left_idx, right_idx = _merge_join_indices(self._data[on[0]], other._data[on[0]], how)
+        else:
+            codes, ngroups, _ = _factorize_keys(keys, sort=False)
+            left_idx, right_idx = _join_indices(codes[:n_left], codes[n_left:], ngroups, how)
+
+        new_data = {}
+        # key values come from whichever side has the row
+        key_idx = np.where(left_idx >= 0, left_idx, n_left + right_idx)
+        for col, values in self._data.items():
+            if col in on:
+                new_data[col] = keys[on.index(col)][key_idx]
+            else:
+                name = col + suffixes[0] if col in other._data else col
+                new_data[name] = _take_or_missing(values, left_idx, left_idx < 0)
+        for col, values in other._data.items():
+            if col not in on:
+                name = col + suffixes[1] if col in self._data else col
+                new_data[name] = _take_or_missing(values, right_idx, right_idx < 0)
+        return DataFrame(new_data)
 
     def _add_docs(self):
         agg_names = ['min', 'max', 'mean', 'median', 'sum', 'var',
@@ -832,49 +1613,49 @@ class StringMethods:
         return self._str_method(str.center, col, width, fillchar)
 
     def count(self, col, sub, start=None, stop=None):
-        return self._str_method(str.count, col, sub, start, stop)
+        return self._str_method(str.count, col, sub, start, stop, dtype='int')
 
     def endswith(self, col, suffix, start=None, stop=None):
-        return self._str_method(str.endswith, col, suffix, start, stop)
+        return self._str_method(str.endswith, col, suffix, start, stop, dtype='bool')
 
     def startswith(self, col, suffix, start=None, stop=None):
-        return self._str_method(str.startswith, col, suffix, start, stop)
+        return self._str_method(str.startswith, col, suffix, start, stop, dtype='bool')
 
     def find(self, col, sub, start=None, stop=None):
-        return self._str_method(str.find, col, sub, start, stop)
+        return self._str_method(str.find, col, sub, start, stop, dtype='int')
 
     def len(self, col):
-        return self._str_method(str.__len__, col)
+        return self._str_method(str.__len__, col, dtype='int')
 
     def get(self, col, item):
         return self._str_method(str.__getitem__, col, item)
 
     def index(self, col, sub, start=None, stop=None):
-        return self._str_method(str.index, col, sub, start, stop)
+        return self._str_method(str.index, col, sub, start, stop, dtype='int')
 
     def isalnum(self, col):
-        return self._str_method(str.isalnum, col)
+        return self._str_method(str.isalnum, col, dtype='bool')
 
     def isalpha(self, col):
-        return self._str_method(str.isalpha, col)
+        return self._str_method(str.isalpha, col, dtype='bool')
 
     def isdecimal(self, col):
-        return self._str_method(str.isdecimal, col)
+        return self._str_method(str.isdecimal, col, dtype='bool')
 
     def islower(self, col):
-        return self._str_method(str.islower, col)
+        return self._str_method(str.islower, col, dtype='bool')
 
     def isnumeric(self, col):
-        return self._str_method(str.isnumeric, col)
+        return self._str_method(str.isnumeric, col, dtype='bool')
 
     def isspace(self, col):
-        return self._str_method(str.isspace, col)
+        return self._str_method(str.isspace, col, dtype='bool')
 
     def istitle(self, col):
-        return self._str_method(str.istitle, col)
+        return self._str_method(str.istitle, col, dtype='bool')
 
     def isupper(self, col):
-        return self._str_method(str.isupper, col)
+        return self._str_method(str.isupper, col, dtype='bool')
 
     def lstrip(self, col, chars):
         return self._str_method(str.lstrip, col, chars)
@@ -885,55 +1666,2070 @@ class StringMethods:
     def strip(self, col, chars):
         return self._str_method(str.strip, col, chars)
 
-    def replace(self, col, old, new, count=None):
+    def replace(self, col, old, new, count=None, regex=False, flags=0):
+        if regex:
+            pattern = _compile_pattern(old, flags)
+            return self._str_method(lambda s: pattern.sub(new, s, count or 0), col)
         if count is None:
             count = -1
         return self._str_method(str.replace, col, old, new, count)
 
-    def swapcase(self, col):
-        return self._str_method(str.swapcase, col)
+    def contains(self, col, pat, case=True, flags=0, regex=True):
+        """
+        Determines whether each value contains a match of the regular
+        expression `pat`, or the substring `pat` when `regex` is False.
+        Missing values are False, so the result can select rows
 
-    def title(self, col):
-        return self._str_method(str.title, col)
+        Returns
+        -------
+        A one-column DataFrame of booleans
+        """
+        if not regex:
+            if case:
+                return self._str_method(str.__contains__, col, pat, dtype='bool', na=False)
+            pat, flags = re.escape(pat), flags | re.IGNORECASE
+        elif not case:
+            flags |= re.IGNORECASE
+        pattern = _compile_pattern(pat, flags)
+        return self._str_method(lambda s: pattern.search(s) is not None, col,
+                                dtype='bool', na=False)
 
-    def lower(self, col):
-        return self._str_method(str.lower, col)
+    def match(self, col, pat, case=True, flags=0):
+        """
+        Determines whether each value starts with a match of the regular
+        expression `pat`. Missing values are False, so the result can
+        select rows
 
-    def upper(self, col):
-        return self._str_method(str.upper, col)
+        Returns
+        -------
+        A one-column DataFrame of booleans
+        """
+        if not case:
+            flags |= re.IGNORECASE
+        pattern = _compile_pattern(pat, flags)
+        return self._str_method(lambda s: pattern.match(s) is not None, col,
+                                dtype='bool', na=False)
 
-    def zfill(self, col, width):
-        return self._str_method(str.zfill, col, width)
+    def extract(self, col, pat, flags=0):
+        """
+        Extracts the groups of the first match of the regular expression
+        `pat` in each value
+
+        Returns
+        -------
+        A DataFrame with one column per group, named after the group
+        when it has a name and '<col>_<group index>' otherwise, starting
+        at 0. Values without a match are None
+        """
+        pattern = _compile_pattern(pat, flags)
+        if pattern.groups == 0:
+            raise ValueError('`pat` must contain at least one group')
+        names = {index: name for name, index in pattern.groupindex.items()}
+        columns = [names.get(i + 1, f'{col}_{i}') for i in range(pattern.groups)]
+
+        def groups(s):
+            match = pattern.search(s)
+            return match and match.groups()
+        return self._str_parts(groups, col, columns)
+
+    def split(self, col, pat=None, n=-1, regex=False):
+        """
+        Splits each value around `pat`, or around runs of whitespace when
+        `pat` is None, making at most `n` splits when `n` is positive and
+        as many as possible otherwise, with or without `regex`
+
+        Returns
+        -------
+        A DataFrame with one column per part named '<col>_<part index>',
+        starting at 0. Values with fewer parts are padded with None
+        """
+        if regex:
+            pattern = _compile_pattern(r'\s+' if pat is None else pat)
+            return self._str_parts(lambda s: pattern.split(s, max(n, 0)), col)
+        return self._str_parts(lambda s: s.split(pat, n if n > 0 else -1), col)
+
+    def swapcase(self, col):
+        return self._str_method(str.swapcase, col)
+
+    def title(self, col):
+        return self._str_method(str.title, col)
+
+    def lower(self, col):
+        return self._str_method(str.lower, col)
+
+    def upper(self, col):
+        return self._str_method(str.upper, col)
+
+    def zfill(self, col, width):
+        return self._str_method(str.zfill, col, width)
 
     def encode(self, col, encoding='utf-8', errors='strict'):
         return self._str_method(str.encode, col, encoding, errors)
 
-    def _str_method(self, method, col, *args):
-        new_vals = []
+    def _str_method(self, method, col, *args, dtype='O', na=None):
+        """
+        Calls `method` once per distinct value of the column and
+        broadcasts the results back to the rows through the codes. The
+        results are written into a preallocated array of `dtype`. Missing
+        values get `na` when given. Otherwise they stay None, which makes
+        boolean results objects, or become NaN, which makes integer
+        results floats
+        """
+        codes, uniques, missing = self._unique_strings(col)
+        if na is None and missing.any():
+            dtype = 'float' if dtype == 'int' else 'O'
+        new_vals = np.empty(len(uniques), dtype=dtype)
+        if na is not None:
+            new_vals[missing] = na
+        elif dtype == 'float':
+            new_vals[missing] = np.nan
+        for i in np.flatnonzero(~missing):
+            new_vals[i] = method(uniques[i], *args)
+        return DataFrame({col: new_vals[codes]})
+
+    def _str_parts(self, method, col, columns=None):
+        # like `_str_method` for a method returning a sequence of strings,
+        # or None, with one output column per position
+        codes, uniques, missing = self._unique_strings(col)
+        parts = [None] * len(uniques)
+        for i in np.flatnonzero(~missing):
+            parts[i] = method(uniques[i])
+        if columns is None:
+            n_parts = max((len(part) for part in parts if part), default=0)
+            columns = [f'{col}_{i}' for i in range(n_parts)]
+        new_data = {name: np.empty(len(uniques), dtype='O') for name in columns}
+        for i, part in enumerate(parts):
+            for name, value in zip(columns, part or ()):
+                new_data[name][i] = value
+        return DataFrame({name: values[codes] for name, values in new_data.items()})
+
+    def _unique_strings(self, col):
         val = self._df._data[col]
         if val.dtype.kind != 'O':
             raise TypeError('`str` accessor can handle only strings')
-        for s in val:
-            if s is None:
-                new_vals.append(s)
+        codes, uniques = self._df._factorize_column(col)
+        return codes, uniques, uniques == None
+
+
+@lru_cache(maxsize=256)
+def _compile_pattern(pattern, flags=0):
+    # regular expressions are compiled once and shared by every call
+    return re.compile(pattern, flags)
+
+
+def _factorize(values, sort=True):
+    """
+    Encodes `values` as dense integer codes
+
+    Integers spanning a range no larger than their count are counted
+    directly. Object arrays are hashed with a dict in a single pass, so
+    strings are never compared with each other unless `sort` is True,
+    in which case only the distinct values are sorted. None is placed
+    last.
+
+    Parameters
+    ----------
+    values: 1-d NumPy array
+    sort: bool
+        If True, the distinct values are sorted, otherwise they are
+        kept in order of first appearance
+
+    Returns
+    -------
+    A tuple of the codes and the array of distinct values
+    """
+    kind = values.dtype.kind
+    if kind in 'iu' and len(values) > 0:
+        low = values.min()
+        span = int(values.max()) - int(low)
+        if span <= len(values):
+            offsets = values - low if kind == 'u' else values.astype('int64') - low
+            return _factorize_small_range(offsets.astype(np.intp), low, sort)
+
+    if kind == 'O':
+        table = {}
+        codes = np.fromiter((table.setdefault(v, len(table)) for v in values),
+                            dtype=np.intp, count=len(values))
+        uniques = np.fromiter(table, dtype='O', count=len(table))
+        if not sort or len(uniques) < 2:
+            return codes, uniques
+        order = sorted(range(len(uniques)),
+                       key=lambda i: (uniques[i] is None, uniques[i]))
+        order = np.array(order, dtype=np.intp)
+    elif sort:
+        uniques, codes = np.unique(values, return_inverse=True)
+        return codes.ravel(), uniques
+    else:
+        uniques, first, codes = np.unique(values, return_index=True,
+                                          return_inverse=True)
+        codes = codes.ravel()
+        order = np.argsort(first)
+
+    ranks = np.empty(len(order), dtype=np.intp)
+    ranks[order] = np.arange(len(order))
+    return ranks[codes], uniques[order]
+
+
+def _factorize_small_range(offsets, low, sort):
+    # integers with a span no larger than their count are counted in O(n)
+    present = np.bincount(offsets) > 0
+    values = np.flatnonzero(present)
+    if not sort:
+        first = np.full(len(present), len(offsets))
+        np.minimum.at(first, offsets, np.arange(len(offsets)))
+        values = values[np.argsort(first[values])]
+    ranks = np.empty(len(present), dtype=np.intp)
+    ranks[values] = np.arange(len(values))
+    return ranks[offsets], (values + low).astype(low.dtype)
+
+
+def _factorize_keys(arrays, sort=True):
+    """
+    Encodes the rows of several key columns as one dense integer code
+    per row without building tuples. The codes of the next column are
+    combined with the running codes in mixed radix and re-encoded, so
+    the combined codes never exceed the number of rows
+
+    Parameters
+    ----------
+    arrays: list of 1-d NumPy arrays of the same length
+    sort: bool
+        If True, groups are in sorted order of their keys, otherwise in
+        order of first appearance
+
+    Returns
+    -------
+    A tuple of the codes, the number of groups, and a list with the
+    key values of every group for each key column
+    """
+    codes, uniques = _factorize(arrays[0], sort)
+    all_uniques = [uniques]
+    key_codes = [np.arange(len(uniques))]
+    for values in arrays[1:]:
+        next_codes, next_uniques = _factorize(values, sort)
+        size = len(next_uniques)
+        codes, combined = _factorize(codes * size + next_codes, sort)
+        key_codes = [key[combined // size] for key in key_codes]
+        key_codes.append(combined % size)
+        all_uniques.append(next_uniques)
+    keys = [uniques[key] for uniques, key in zip(all_uniques, key_codes)]
+    return codes, len(key_codes[0]), keys
+
+
+def _sort_key(values):
+    """
+    Returns an array that sorts exactly like `values` but that NumPy
+    can sort faster. Integers spanning a small range become 8 or 16-bit
+    offsets, which a stable sort orders with a radix sort, and strings
+    become the ranks of their distinct values
+    """
+    kind = values.dtype.kind
+    if kind == 'O':
+        values, uniques = _factorize(values, sort=True)
+        span = len(uniques)
+    elif kind in 'iub' and len(values) > 0 and values.dtype.itemsize > 2:
+        low = values.min()
+        span = int(values.max()) - int(low)
+        if span >= 2 ** 16:
+            return values
+        values = values - low
+    else:
+        return values
+    return values.astype('uint8' if span < 2 ** 8 else 'uint16' if span < 2 ** 16 else 'int64')
+
+
+class _BitmapIndex:
+    """
+    One packed bitmap per distinct value of a column: bit i of
+    `bitmaps[k]` is set when row i equals `uniques[k]`. Bitmaps are
+    padded to whole 64-bit words so they are combined a word at a time
+    """
+
+    def __init__(self, values, max_cardinality):
+        self.codes, self.uniques = _factorize(values, sort=False)
+        if len(self.uniques) > max_cardinality:
+            raise ValueError(f'Column has {len(self.uniques)} distinct values, '
+                             f'more than `max_cardinality` of {max_cardinality}')
+        self.size = len(values)
+        self.positions = {value: i for i, value in enumerate(self.uniques)}
+        n_words = (self.size + 63) // 64
+        packed = np.zeros((len(self.uniques), n_words * 8), dtype='uint8')
+        n_bytes = (self.size + 7) // 8
+        for i in range(len(self.uniques)):
+            packed[i, :n_bytes] = np.packbits(self.codes == i)
+        self.bitmaps = packed.view('uint64')
+
+    def bitmap(self, values):
+        # bitwise OR of the bitmaps of every value in `values`
+        bitmap = np.zeros(self.bitmaps.shape[1], dtype='uint64')
+        for value in values:
+            position = self.positions.get(value)
+            if position is not None:
+                bitmap |= self.bitmaps[position]
+        return bitmap
+
+    def unpack(self, bitmap, invert=False):
+        if invert:
+            bitmap = ~bitmap
+        bits = np.unpackbits(bitmap.view('uint8'), count=self.size)
+        return bits.view('bool')
+
+
+class GroupBy:
+
+    def __init__(self, df, keys):
+        """
+        Rows of a DataFrame grouped by the distinct values of one or
+        more key columns. The keys are factorized into one integer code
+        per row when the GroupBy is created, and every aggregation
+        reuses those codes
+
+        Parameters
+        ----------
+        df: DataFrame
+        keys: str or list of column names
+        """
+        if isinstance(keys, str):
+            keys = [keys]
+        elif not isinstance(keys, list) or not keys:
+            raise TypeError('`keys` must be a str or a non-empty list')
+        for key in keys:
+            if key not in df._data:
+                raise KeyError(f'Column `{key}` does not exist')
+        self._df = df
+        self._keys = keys
+        codes, ngroups, self._key_values = _factorize_keys([df._data[key] for key in keys])
+        self._groups = _Groups(codes, ngroups)
+
+    def size(self):
+        """
+        Counts the rows of each group
+
+        Returns
+        -------
+        A DataFrame
+        """
+        new_data = dict(zip(self._keys, self._key_values))
+        new_data['size'] = self._groups.counts
+        return DataFrame(new_data)
+
+    def agg(self, aggs):
+        """
+        Computes several aggregations of several columns over the same
+        groups in one call
+
+        Parameters
+        ----------
+        aggs: dict
+            Maps column names to the name of a NumPy aggregation
+            function, 'size' or 'count', or to a list of those names
+
+        Returns
+        -------
+        A DataFrame with the key columns followed by one column per
+        aggregation. A column aggregated with a list of names produces
+        columns named '<column>_<aggfunc>'
+        """
+        if not isinstance(aggs, dict):
+            raise TypeError('`aggs` must be a `dict`')
+        new_data = dict(zip(self._keys, self._key_values))
+        for col, aggfuncs in aggs.items():
+            values = self._df._data[col]
+            if isinstance(aggfuncs, str):
+                new_data[col] = self._groups.reduce(values, aggfuncs)
+            else:
+                for aggfunc in aggfuncs:
+                    new_data[f'{col}_{aggfunc}'] = self._groups.reduce(values, aggfunc)
+        return DataFrame(new_data)
+
+    def cumsum(self):
+        """
+        Cumulative sum of the numeric columns within each group. Missing
+        values are skipped and stay missing
+
+        Returns
+        -------
+        A DataFrame aligned with the rows of the original DataFrame
+        """
+        return self._transform_columns(self._groups.cumsum, numeric=True)
+
+    def cummax(self):
+        """
+        Cumulative maximum within each group. Missing values are skipped
+        and stay missing
+
+        Returns
+        -------
+        A DataFrame aligned with the rows of the original DataFrame
+        """
+        return self._transform_columns(lambda values: self._groups.cumextreme(values, 'max'))
+
+    def cummin(self):
+        """
+        Cumulative minimum within each group. Missing values are skipped
+        and stay missing
+
+        Returns
+        -------
+        A DataFrame aligned with the rows of the original DataFrame
+        """
+        return self._transform_columns(lambda values: self._groups.cumextreme(values, 'min'))
+
+    def rank(self, ascending=True):
+        """
+        Rank of each value within its group, starting at 1. Tied values
+        get the average of their ranks and missing values get NaN
+
+        Parameters
+        ----------
+        ascending: bool
+
+        Returns
+        -------
+        A DataFrame aligned with the rows of the original DataFrame
+        """
+        return self._transform_columns(lambda values: self._groups.rank(values, ascending))
+
+    def shift(self, n=1):
+        """
+        Moves the values of each group down by `n` rows, or up when
+        `n` is negative. Rows shifted in from outside the group are
+        missing
+
+        Parameters
+        ----------
+        n: int
+
+        Returns
+        -------
+        A DataFrame aligned with the rows of the original DataFrame
+        """
+        return self._transform_columns(lambda values: self._groups.shift(values, n))
+
+    def diff(self, n=1):
+        """
+        Difference between each value and the value `n` rows above it
+        within the same group
+
+        Parameters
+        ----------
+        n: int
+
+        Returns
+        -------
+        A DataFrame aligned with the rows of the original DataFrame
+        """
+        def func(values):
+            # booleans are differenced as 0 and 1, as in DataFrame.diff
+            if values.dtype.kind == 'b':
+                values = values.astype('int')
+            return values - self._groups.shift(values, n)
+        return self._transform_columns(func, numeric=True)
+
+    def transform(self, func):
+        """
+        Applies a function to every group and aligns the result with
+        the original rows
+
+        Parameters
+        ----------
+        func: str or function
+            The name of a NumPy aggregation function, 'size' or 'count'
+            broadcasts the aggregate of each group to all its rows,
+            using only the numeric columns except for 'size' and
+            'count'. A
+            function is called with the values of each group and must
+            return a scalar or an array of the same length
+
+        Returns
+        -------
+        A DataFrame aligned with the rows of the original DataFrame
+        """
+        groups = self._groups
+        if isinstance(func, str):
+            def transformer(values):
+                return groups.reduce(values, func)[groups.codes]
+            return self._transform_columns(transformer, numeric=func not in ('size', 'count'))
+
+        def transformer(values):
+            ordered = values[groups.order]
+            pieces = [np.broadcast_to(func(group), len(group))
+                      for group in np.split(ordered, groups.starts[1:])
+                      if len(group)]
+            result = np.empty(len(values), dtype=np.result_type(*pieces) if pieces else values.dtype)
+            if pieces:
+                result[groups.order] = np.concatenate(pieces)
+            return result
+        return self._transform_columns(transformer)
+
+    def _transform_columns(self, func, numeric=False):
+        new_data = {}
+        for col, values in self._df._data.items():
+            if col in self._keys or (numeric and values.dtype.kind not in 'biuf'):
+                continue
+            new_data[col] = func(values)
+        return DataFrame(new_data)
+
+
+class PartialAgg:
+
+    AGGFUNCS = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max')
+
+    def __init__(self, by=None):
+        """
+        Mergeable partial aggregates of the numeric columns of a stream
+        of DataFrames, such as the chunks of `read_csv`. Feed chunks
+        with `update`, combine states built elsewhere with `merge` and
+        read the final aggregates with `result`. Each column keeps its
+        row count, non-missing count, sum, mean, sum of squared
+        deviations, minimum and maximum, per group when `by` is given.
+        Variances are combined with the pairwise form of Welford's
+        algorithm, so results match the in-memory aggregations. A column
+        must be numeric in every chunk or in none of them
+
+        Parameters
+        ----------
+        by: str or list of column names to group by, optional
+        """
+        if isinstance(by, str):
+            by = [by]
+        elif by is not None and not isinstance(by, list):
+            raise TypeError('`by` must be a str or a list')
+        self._by = by or []
+        self._states = {}
+        self._slots = {}
+        self._keys = []
+        self._key_dtypes = None
+        self._skipped = set()
+
+    def update(self, df):
+        """
+        Adds the rows of a DataFrame to the aggregates
+
+        Parameters
+        ----------
+        df: DataFrame
+
+        Returns
+        -------
+        None
+        """
+        if len(df) == 0:
+            return
+        skipped = {col for col, val in df._data.items()
+                   if col not in self._by and val.dtype.kind not in 'biuf'}
+        self._check_columns(self._states, skipped)
+        self._check_columns(df._data.keys() - skipped - set(self._by), self._skipped)
+        self._skipped |= skipped
+
+        if self._by:
+            arrays = [df._data[key] for key in self._by]
+            self._widen_keys([values.dtype for values in arrays])
+            codes, ngroups, keys = _factorize_keys(arrays)
+            slots = self._find_slots(zip(*keys))
+        else:
+            codes, ngroups, slots = np.zeros(len(df), dtype=np.intp), 1, np.array([0])
+            self._keys = [()]
+
+        groups = _Groups(codes, ngroups)
+        for col, val in df._data.items():
+            if col in self._by or col in skipped:
+                continue
+            n = groups.counts
+            part = {'n': n,
+                    'count': groups.reduce(val, 'count'),
+                    'sum': groups.reduce(val, 'sum'),
+                    'mean': groups.reduce(val, 'mean'),
+                    'm2': groups.reduce(val, 'var') * n,
+                    'min': groups.reduce(val, 'min'),
+                    'max': groups.reduce(val, 'max')}
+            self._combine(col, slots, part)
+
+    def merge(self, other):
+        """
+        Adds the aggregates of another PartialAgg, built with the same
+        `by`, to this one
+
+        Parameters
+        ----------
+        other: PartialAgg
+
+        Returns
+        -------
+        None
+        """
+        if not isinstance(other, PartialAgg):
+            raise TypeError('`other` must be a PartialAgg')
+        if other._by != self._by:
+            raise ValueError('Can only merge aggregates grouped by the same columns')
+        self._check_columns(self._states, other._skipped)
+        self._check_columns(other._states, self._skipped)
+        self._skipped |= other._skipped
+        if not other._keys:
+            return
+        if self._by:
+            self._widen_keys(other._key_dtypes)
+            slots = self._find_slots(other._keys)
+        else:
+            slots = np.array([0])
+            self._keys = [()]
+        for col, state in other._states.items():
+            self._combine(col, slots, state)
+
+    def result(self, aggfunc):
+        """
+        Returns the aggregate of every numeric column seen so far
+
+        Parameters
+        ----------
+        aggfunc: one of 'count', 'sum', 'mean', 'var', 'std', 'min', 'max'
+
+        Returns
+        -------
+        A DataFrame shaped like the one of the in-memory aggregation,
+        with the key columns first and one row per group when grouped
+        """
+        if aggfunc not in self.AGGFUNCS:
+            raise ValueError(f'`aggfunc` must be one of {self.AGGFUNCS}')
+        new_data = {}
+        order = slice(None)
+        if self._by and self._keys:
+            # groups are reported in sorted order of their keys
+            key_arrays = [np.array([key[i] for key in self._keys], dtype=dtype)
+                          for i, dtype in enumerate(self._key_dtypes)]
+            codes, _, _ = _factorize_keys(key_arrays)
+            order = np.argsort(codes)
+            for name, values in zip(self._by, key_arrays):
+                new_data[name] = values[order]
+
+        for col, state in self._states.items():
+            if aggfunc in ('var', 'std'):
+                values = state['m2'] / state['n']
+                if aggfunc == 'std':
+                    values = np.sqrt(values)
             else:
-                new_vals.append(method(s, *args))
-        return DataFrame({col:np.array(new_vals)})
+                values = state[aggfunc]
+            new_data[col] = values[order]
+        return DataFrame(new_data)
+
+    def _check_columns(self, numeric, skipped):
+        # a column left out of one chunk would silently lose its rows
+        mixed = sorted(set(numeric) & skipped)
+        if mixed:
+            raise TypeError(f'Column `{mixed[0]}` is numeric in some chunks and not in others')
+
+    def _widen_keys(self, dtypes):
+        if self._key_dtypes is None:
+            self._key_dtypes = list(dtypes)
+        else:
+            self._key_dtypes = [np.result_type(old, new)
+                                for old, new in zip(self._key_dtypes, dtypes)]
+
+    def _find_slots(self, keys):
+        # maps group keys to their position in the state arrays
+        slots = []
+        for key in keys:
+            key = tuple(key)
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = len(self._keys)
+                self._keys.append(key)
+            slots.append(slot)
+        return np.array(slots, dtype=np.intp)
+
+    def _combine(self, col, slots, part):
+        state = self._states.get(col)
+        if state is None:
+            state = self._states[col] = {name: values[:0] for name, values in part.items()}
+        old_size = len(state['n'])
+        for name, values in state.items():
+            dtype = np.result_type(values, part[name])
+            if len(self._keys) > old_size or dtype != values.dtype:
+                new_values = np.zeros(len(self._keys), dtype=dtype)
+                new_values[:old_size] = values
+                state[name] = new_values
+
+        # groups seen for the first time take the partial state as is
+        new = slots >= old_size
+        for name, values in part.items():
+            state[name][slots[new]] = values[new]
+
+        old = ~new
+        if old.any():
+            idx = slots[old]
+            n_a, n_b = state['n'][idx], part['n'][old]
+            n = n_a + n_b
+            delta = part['mean'][old] - state['mean'][idx]
+            state['m2'][idx] += part['m2'][old] + delta ** 2 * n_a * n_b / n
+            state['mean'][idx] += delta * n_b / n
+            state['n'][idx] = n
+            state['count'][idx] += part['count'][old]
+            state['sum'][idx] += part['sum'][old]
+            state['min'][idx] = np.minimum(state['min'][idx], part['min'][old])
+            state['max'][idx] = np.maximum(state['max'][idx], part['max'][old])
+
+
+class AppendBuffer:
+
+    def __init__(self, capacity=1024):
+        """
+        Collects batches of rows, such as those of a stream, into one
+        DataFrame. Every column is kept in a preallocated array whose
+        capacity doubles when it is full, so appending n rows copies
+        O(n) values in total instead of the O(n ** 2) of concatenating
+        after every batch
+
+        Parameters
+        ----------
+        capacity: int of initial number of rows
+        """
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError('`capacity` must be a positive int')
+        self._capacity = capacity
+        self._size = 0
+        self._data = {}
+
+    def __len__(self):
+        return self._size
+
+    def append(self, df):
+        """
+        Adds the rows of a DataFrame. Columns that are not in every
+        batch are missing for the rows of the batches without them:
+        NaN for numbers and None for strings and booleans
+
+        Parameters
+        ----------
+        df: DataFrame
+
+        Returns
+        -------
+        None
+        """
+        if not isinstance(df, DataFrame):
+            raise TypeError('`df` must be a DataFrame')
+        size = self._size + len(df)
+        if size > self._capacity:
+            self._capacity = max(size, 2 * self._capacity)
+            for col, buffer in self._data.items():
+                self._data[col] = np.empty(self._capacity, dtype=buffer.dtype)
+                self._data[col][:self._size] = buffer[:self._size]
+
+        for col, values in df._data.items():
+            buffer = self._data.get(col)
+            if buffer is None:
+                # the rows of the earlier batches are missing
+                dtype = _nullable_dtype(values.dtype) if self._size else values.dtype
+                buffer = np.empty(self._capacity, dtype=dtype)
+                if self._size:
+                    buffer[:self._size] = _missing_value(dtype)
+            elif _common_dtype(buffer.dtype, values.dtype) != buffer.dtype:
+                buffer = buffer.astype(_common_dtype(buffer.dtype, values.dtype))
+            buffer[self._size:size] = values
+            self._data[col] = buffer
+        if len(df):
+            for col, buffer in self._data.items():
+                if col not in df._data:
+                    dtype = _nullable_dtype(buffer.dtype)
+                    if dtype != buffer.dtype:
+                        buffer = self._data[col] = buffer.astype(dtype)
+                    buffer[self._size:size] = _missing_value(dtype)
+        self._size = size
+
+    def to_frame(self):
+        """
+        Copies the rows appended so far into a DataFrame
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return DataFrame({col: buffer[:self._size].copy() for col, buffer in self._data.items()})
+
+
+class HyperLogLog:
+
+    def __init__(self, error=0.01):
+        """
+        Mergeable HyperLogLog sketch that estimates the number of
+        distinct values it has seen. Values are hashed with
+        `_hash_array`, so sketches built in different processes can be
+        merged
+
+        Parameters
+        ----------
+        error: float of relative standard error. It sets the number of
+            registers to about (1.04 / error) ** 2
+        """
+        if not 0 < error < 1:
+            raise ValueError('`error` must be between 0 and 1')
+        self.p = int(np.clip(np.ceil(np.log2((1.04 / error) ** 2)), 4, 18))
+        self.registers = np.zeros(2 ** self.p, dtype='uint8')
+
+    def update(self, values):
+        """
+        Adds the values of a 1-d NumPy array to the sketch
+        """
+        if len(values) == 0:
+            return
+        hashes = _hash_array(values)
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = hashes & np.uint64(2 ** (64 - self.p) - 1)
+        # position of the leftmost set bit of the remaining bits
+        high, low = rest >> np.uint64(32), rest & np.uint64(2 ** 32 - 1)
+        bit_length = np.where(high > 0, 32 + np.frexp(high.astype('float'))[1],
+                              np.frexp(low.astype('float'))[1])
+        rank = (64 - self.p + 1 - bit_length).astype('uint8')
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        """
+        Adds the values seen by another HyperLogLog with the same `error`
+        """
+        if self.p != other.p:
+            raise ValueError('Can only merge sketches with the same `error`')
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        """
+        Returns the estimated number of distinct values as an int
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype('float')))
+        zeros = np.count_nonzero(self.registers == 0)
+        # linear counting is more accurate for small cardinalities
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
 
 
+class QuantileSketch:
 
-def read_csv(fn):
+    def __init__(self, k=200, seed=0):
+        """
+        Mergeable KLL sketch that estimates quantiles of the values it
+        has seen. Items are stored in levels where an item of level h
+        stands for 2 ** h values. A level that outgrows its capacity is
+        sorted and every other item, from a random offset, moves up a
+        level. The rank error is roughly proportional to 1 / k
+
+        Parameters
+        ----------
+        k: int of capacity of the top level
+        seed: int seeding the choice of items kept when compacting
+        """
+        if not isinstance(k, int) or k < 2:
+            raise ValueError('`k` must be an int of at least 2')
+        self.k = k
+        self.count = 0
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Adds the values of a 1-d NumPy array to the sketch. Missing
+        values are skipped
+        """
+        values = np.asarray(values, dtype='float')
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self._levels[0] = np.concatenate((self._levels[0], values))
+        self._compress()
+
+    def merge(self, other):
+        """
+        Adds the values seen by another QuantileSketch
+        """
+        for h, items in enumerate(other._levels):
+            if h == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[h] = np.concatenate((self._levels[h], items))
+        self.count += other.count
+        self._compress()
+
+    def quantile(self, q):
+        """
+        Returns the estimated q-th quantile, or NaN when empty
+
+        Parameters
+        ----------
+        q: float or array of floats between 0 and 1
+        """
+        if np.any((np.asarray(q) < 0) | (np.asarray(q) > 1)):
+            raise ValueError('`q` must be between 0 and 1')
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan)[()]
+        items = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h)
+                                  for h, level in enumerate(self._levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1])
+        return items[order][np.minimum(positions, len(items) - 1)]
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        h = 0
+        while h < len(self._levels):
+            items = self._levels[h]
+            if len(items) > self._capacity(h):
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # an odd item out stays on this level
+                odd = len(items) % 2
+                promoted = items[odd + self._rng.integers(2)::2]
+                self._levels[h + 1] = np.concatenate((self._levels[h + 1], promoted))
+                self._levels[h] = items[:odd]
+            h += 1
+
+
+class Rolling:
+
+    def __init__(self, df, window, min_periods=None):
+        """
+        Windows of `window` consecutive rows ending at each row. Every
+        statistic takes O(n) time whatever the window size: sums and
+        means difference cumulative sums, while variances, minimums and
+        maximums combine running statistics computed within fixed blocks
+        of `window` rows (the van Herk/Gil-Werman algorithm)
+
+        Parameters
+        ----------
+        df: DataFrame
+        window: int
+        min_periods: int, optional
+        """
+        if not isinstance(window, int) or window < 1:
+            raise ValueError('`window` must be a positive int')
+        if min_periods is None:
+            min_periods = window
+        elif not isinstance(min_periods, int) or not 0 <= min_periods <= window:
+            raise ValueError('`min_periods` must be an int between 0 and `window`')
+        self._df = df
+        self._window = window
+        self._min_periods = min_periods
+
+    def sum(self):
+        return self._apply('sum')
+
+    def mean(self):
+        return self._apply('mean')
+
+    def var(self, ddof=0):
+        """
+        Variance in each window, with `ddof` delta degrees of freedom
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._apply('var', ddof)
+
+    def std(self, ddof=0):
+        """
+        Standard deviation in each window, with `ddof` delta degrees
+        of freedom
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._apply('std', ddof)
+
+    def min(self):
+        return self._apply('min')
+
+    def max(self):
+        return self._apply('max')
+
+    def _apply(self, name, ddof=0):
+        def func(col, val):
+            if val.dtype.kind not in 'biuf':
+                return None
+            values = val.astype('float')
+            valid = ~np.isnan(values)
+            counts = _window_sum(valid.astype(np.intp), self._window)
+            if name in ('min', 'max'):
+                fill = np.inf if name == 'min' else -np.inf
+                ufunc = np.minimum if name == 'min' else np.maximum
+                result = _window_extreme(np.where(valid, values, fill), self._window, ufunc)
+            elif name in ('var', 'std'):
+                m2 = _window_moments(values, self._window)[2]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    result = m2 / (counts - ddof)
+                result[counts <= ddof] = np.nan
+                if name == 'std':
+                    result = np.sqrt(result)
+            else:
+                shift = values[valid].mean() if valid.any() else 0.
+                sums = _window_sum(np.where(valid, values - shift, 0.), self._window)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    result = sums + counts * shift if name == 'sum' else sums / counts + shift
+            result[(counts < self._min_periods) | (counts == 0)] = np.nan
+            return result
+
+        new_data = {}
+        for col, result in zip(self._df._data, _map_columns(func, self._df)):
+            if result is not None:
+                new_data[col] = result
+        return DataFrame(new_data)
+
+
+class Expanding:
+
+    def __init__(self, df, min_periods=1, state=None):
+        """
+        Statistics of all rows up to and including each row, computed
+        from cumulative sums of the values shifted by a reference value.
+        The running count, mean and sum of squared deviations after the
+        last row are kept so that `update` continues the calculation on
+        the next chunk of a stream without revisiting earlier rows
+
+        Parameters
+        ----------
+        df: DataFrame
+        min_periods: int
+        state: dict, used by `update`
+        """
+        if not isinstance(min_periods, int) or min_periods < 0:
+            raise ValueError('`min_periods` must be a non-negative int')
+        self._df = df
+        self._min_periods = min_periods
+        self._state = state or {}
+        self._moments = {}
+
+    def mean(self):
+        return self._apply(lambda counts, means, m2: means)
+
+    def var(self, ddof=0):
+        """
+        Variance of all rows up to each row, with `ddof` delta degrees
+        of freedom
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._apply(lambda counts, means, m2: m2 / (counts - ddof), ddof)
+
+    def std(self, ddof=0):
+        """
+        Standard deviation of all rows up to each row, with `ddof`
+        delta degrees of freedom
+
+        Returns
+        -------
+        A DataFrame
+        """
+        return self._apply(lambda counts, means, m2: np.sqrt(m2 / (counts - ddof)), ddof)
+
+    def update(self, df):
+        """
+        Continues the calculation on `df`, the rows following the ones
+        of this object, such as the next chunk of a stream
+
+        Returns
+        -------
+        An Expanding object over `df`
+        """
+        state = dict(self._state)
+        for col in self._columns():
+            counts, means, m2 = self._get_moments(col)
+            # nothing to carry before the first non-missing value
+            if len(counts) and counts[-1]:
+                state[col] = (counts[-1], means[-1], m2[-1])
+        return Expanding(df, self._min_periods, state)
+
+    def _columns(self):
+        return [col for col, val in self._df._data.items() if val.dtype.kind in 'biuf']
+
+    def _get_moments(self, col):
+        if col not in self._moments:
+            n, mean, m2 = self._state.get(col, (0, 0., 0.))
+            values = self._df._data[col].astype('float')
+            valid = ~np.isnan(values)
+            shift = mean if n or not valid.any() else values[valid][0]
+            centered = np.where(valid, values - shift, 0.)
+            counts = n + np.cumsum(valid)
+            sums = n * (mean - shift) + np.cumsum(centered)
+            squares = m2 + n * (mean - shift) ** 2 + np.cumsum(centered ** 2)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                means = shift + sums / counts
+                m2 = np.maximum(squares - sums ** 2 / counts, 0)
+            self._moments[col] = counts, means, m2
+        return self._moments[col]
+
+    def _apply(self, func, ddof=0):
+        new_data = {}
+        for col in self._columns():
+            counts, means, m2 = self._get_moments(col)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = func(counts, means, m2)
+            result[(counts < self._min_periods) | (counts <= ddof) | (counts == 0)] = np.nan
+            new_data[col] = result
+        return DataFrame(new_data)
+
+
+class EWM:
+
+    def __init__(self, df, alpha=None, span=None, halflife=None, adjust=True, state=None):
+        """
+        Exponentially weighted statistics, built from decayed sums
+        s = (1 - alpha) * s + u, which are solved in vectorized blocks
+        rather than one row at a time. The mean is a ratio of decayed
+        sums, and the squared deviations from it decay with the weighted
+        Welford update, whose increments are never negative. Missing
+        values get no weight but still age the previous values. The
+        weights, mean and squared deviations after the last row are kept
+        so that `update` continues the calculation on the next chunk of
+        a stream
+
+        Parameters
+        ----------
+        df: DataFrame
+        alpha, span, halflife: float, exactly one must be given
+        adjust: bool
+        state: dict, used by `update`
+        """
+        if sum(param is not None for param in (alpha, span, halflife)) != 1:
+            raise ValueError('Provide exactly one of `alpha`, `span` or `halflife`')
+        if span is not None:
+            if span < 1:
+                raise ValueError('`span` must be at least 1')
+            alpha = 2 / (span + 1)
+        elif halflife is not None:
+            if halflife <= 0:
+                raise ValueError('`halflife` must be positive')
+            alpha = 1 - np.exp(-np.log(2) / halflife)
+        if not 0 < alpha <= 1:
+            raise ValueError('`alpha` must be in (0, 1]')
+        self._df = df
+        self._alpha = alpha
+        self._adjust = adjust
+        self._state = state or {}
+        self._moments = {}
+
+    def mean(self):
+        return self._apply(lambda weights, means, m2, weights2: means)
+
+    def var(self, bias=False):
+        """
+        Exponentially weighted variance
+
+        Parameters
+        ----------
+        bias: bool
+            If False, the variance is corrected for the effective
+            number of values
+
+        Returns
+        -------
+        A DataFrame
+        """
+        def func(weights, means, m2, weights2):
+            var = m2 / weights
+            if bias:
+                return var
+            var = var * weights ** 2 / (weights ** 2 - weights2)
+            var[weights ** 2 - weights2 <= 1e-12 * weights ** 2] = np.nan
+            return var
+        return self._apply(func)
+
+    def std(self, bias=False):
+        """
+        Exponentially weighted standard deviation
+
+        Parameters
+        ----------
+        bias: bool
+            If False, the variance is corrected for the effective
+            number of values
+
+        Returns
+        -------
+        A DataFrame
+        """
+        var = self.var(bias)
+        return DataFrame({col: np.sqrt(val) for col, val in var._data.items()})
+
+    def update(self, df):
+        """
+        Continues the calculation on `df`, the rows following the ones
+        of this object, such as the next chunk of a stream
+
+        Returns
+        -------
+        An EWM object over `df`
+        """
+        state = dict(self._state)
+        for col in self._columns():
+            weights, means, m2, weights2 = self._get_moments(col)
+            if len(self._df):
+                mean = means[-1] if weights[-1] else 0.
+                state[col] = (weights[-1], mean, m2[-1], weights2[-1])
+        return EWM(df, alpha=self._alpha, adjust=self._adjust, state=state)
+
+    def _columns(self):
+        return [col for col, val in self._df._data.items() if val.dtype.kind in 'biuf']
+
+    def _get_moments(self, col):
+        if col not in self._moments:
+            values = self._df._data[col].astype('float')
+            valid = ~np.isnan(values)
+            weight, mean, m2, weight2 = self._state.get(col, (0., 0., 0., 0.))
+            # the mean carried over centres the chunk, which contributes
+            # nothing to the centred sum before its first value
+            if not weight and valid.any():
+                mean = values[valid][0]
+            new_weights = valid * (1. if self._adjust else self._alpha)
+            if not self._adjust and weight == 0 and valid.any():
+                # the recursive form starts from the first value
+                new_weights[np.argmax(valid)] = 1.
+            decay = 1 - self._alpha
+            weights = _decayed_cumsum(new_weights, decay, weight)
+            sums = _decayed_cumsum(new_weights * np.where(valid, values - mean, 0.), decay, 0.)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                means = mean + sums / weights
+            previous = np.empty(len(values))
+            previous[:1] = mean
+            previous[1:] = means[:-1]
+            previous = np.where(weights > new_weights, previous, values)
+            increments = np.where(valid, new_weights * (values - previous) * (values - means), 0.)
+            self._moments[col] = (weights, means,
+                                  _decayed_cumsum(increments, decay, m2),
+                                  _decayed_cumsum(new_weights ** 2, decay ** 2, weight2))
+        return self._moments[col]
+
+    def _apply(self, func):
+        new_data = {}
+        for col in self._columns():
+            weights, means, m2, weights2 = self._get_moments(col)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = func(weights, means, m2, weights2)
+            result[weights == 0] = np.nan
+            new_data[col] = result
+        return DataFrame(new_data)
+
+
+def _decayed_cumsum(values, decay, initial):
+    """
+    Solves s[t] = decay * s[t - 1] + values[t] for every t, with
+    `initial` as the value before the first element. Within a block of
+    length L, s[j] = decay ** j * (decay * s_in + cumsum(values * decay ** -i)),
+    and L is chosen so that decay ** -L stays far from overflowing
+    """
+    n = len(values)
+    if decay == 0:
+        return values.astype('float')
+    if decay == 1:
+        return initial + np.cumsum(values)
+    block = int(min(max(n, 1), max(1, 100 / -np.log10(decay))))
+    powers = decay ** np.arange(block)
+    inverse = 1 / powers
+    result = np.empty(n)
+    state = initial
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        m = len(chunk)
+        result[start:start + m] = powers[:m] * (decay * state + np.cumsum(chunk * inverse[:m]))
+        state = result[start + m - 1]
+    return result
+
+
+def _window_sum(values, window):
+    # sum of each window of `window` values ending at each position
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums
+
+
+def _window_extreme(values, window, ufunc):
+    """
+    Minimum or maximum, given by `ufunc`, of each window of `window`
+    values ending at each position. Running extremes are computed
+    forwards and backwards within blocks of `window` values, and every
+    window spans at most two blocks
+    """
+    n = len(values)
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, values[0] if n else 0.)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    result = np.empty(n)
+    result[:window - 1] = ufunc.accumulate(values[:window - 1])
+    if n >= window:
+        result[window - 1:] = ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+    return result
+
+
+def _block_moments(blocks):
+    # count, mean and sum of squared deviations of the non-missing
+    # values of each row of `blocks` up to each position, with
+    # Welford's update, whose increments are never negative
+    valid = ~np.isnan(blocks)
+    values = np.where(valid, blocks, 0.)
+    counts = np.cumsum(valid, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = np.where(counts > 0, np.cumsum(values, axis=1) / counts, 0.)
+    previous = np.zeros_like(means)
+    previous[:, 1:] = means[:, :-1]
+    previous = np.where(counts > valid, previous, values)
+    m2 = np.cumsum(np.where(valid, (values - previous) * (values - means), 0.), axis=1)
+    return counts, means, m2
+
+
+def _window_moments(values, window):
+    """
+    Count, mean and sum of squared deviations of the non-missing
+    values in each window of `window` values ending at each position.
+    As in `_window_extreme`, a window spans the end of one block of
+    `window` values and the start of the next. The moments of both
+    parts are accumulated away from the boundary between the blocks
+    and merged with Chan's formula, so values outside a window never
+    enter its variance, however large they are
+    """
+    n = len(values)
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, np.nan)
+    padded[:n] = values
+    blocks = padded.reshape(n_blocks, window)
+    prefix = [m.ravel() for m in _block_moments(blocks)]
+    suffix = [m[:, ::-1].ravel() for m in _block_moments(blocks[:, ::-1])]
+
+    counts, means, m2 = (m[:n].astype('float') for m in prefix)
+    if n >= window:
+        # a window starting a block lies within it and needs no suffix
+        whole = np.arange(n - window + 1) % window == 0
+        n_a, mean_a, m2_a = (np.where(whole, 0, m[:n - window + 1]) for m in suffix)
+        n_b, mean_b, m2_b = (m[window - 1:n] for m in prefix)
+        total = n_a + n_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(total > 0, n_b / total, 0.)
+        delta = mean_b - mean_a
+        counts[window - 1:] = total
+        means[window - 1:] = mean_a + delta * weight
+        m2[window - 1:] = m2_a + m2_b + delta ** 2 * n_a * weight
+    return counts, means, m2
+
+
+class _Groups:
+    """
+    Rows split into groups by dense integer codes. The rows are sorted
+    by code at most once, which makes every group a contiguous slice,
+    and that order is shared by every reduction on the groups
+    """
+
+    UFUNCS = {'sum': np.add, 'prod': np.multiply,
+              'min': np.minimum, 'max': np.maximum}
+
+    def __init__(self, codes, ngroups):
+        self.codes = codes
+        self.ngroups = ngroups
+        self.counts = np.bincount(codes, minlength=ngroups)
+        self._order = None
+
+    @property
+    def order(self):
+        if self._order is None:
+            self._order = np.argsort(self.codes, kind='stable')
+        return self._order
+
+    @property
+    def starts(self):
+        # position of the first row of every group in `order`
+        return np.cumsum(self.counts) - self.counts
+
+    def reduce(self, values, aggfunc):
+        """
+        Aggregates `values` within every group
+
+        Sums, means and variances are accumulated with `np.bincount`
+        and need no sort. Minimums, maximums and products use
+        `ufunc.reduceat` on the rows sorted by group, and medians pick
+        the middle of each group after sorting by group and value.
+        Any other NumPy function is called once per group.
+
+        Parameters
+        ----------
+        values: NumPy array, or None when `aggfunc` is 'size'
+        aggfunc: str of aggregation function name in NumPy, 'size'
+            or 'count' for the number of non-missing values
+
+        Returns
+        -------
+        A NumPy array with one value per group. The values of empty
+        groups are unspecified and must be masked with `counts`
+        """
+        if aggfunc == 'size':
+            return self.counts
+        if not isinstance(aggfunc, str):
+            raise TypeError('`aggfunc` must be a str')
+        kind = values.dtype.kind
+        if aggfunc == 'count':
+            if kind == 'f':
+                missing = np.isnan(values)
+            elif kind == 'O':
+                missing = values == None
+            else:
+                return self.counts
+            return self.counts - np.bincount(self.codes, weights=missing,
+                                             minlength=self.ngroups).astype('int')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if aggfunc in ('mean', 'var', 'std') or (aggfunc == 'sum' and kind in 'fc'):
+                sums = np.bincount(self.codes, weights=values, minlength=self.ngroups)
+                if aggfunc == 'sum':
+                    return sums
+                means = sums / self.counts
+                if aggfunc == 'mean':
+                    return means
+                deviations = values - means[self.codes]
+                var = np.bincount(self.codes, weights=deviations ** 2,
+                                  minlength=self.ngroups) / self.counts
+                return var if aggfunc == 'var' else np.sqrt(var)
+
+            if aggfunc in ('any', 'all'):
+                hits = np.bincount(self.codes, weights=values.astype('bool'),
+                                   minlength=self.ngroups)
+                return hits > 0 if aggfunc == 'any' else hits == self.counts
+
+            nonempty = self.counts > 0
+            starts = self.starts[nonempty]
+            if len(values) == 0:
+                reduced = getattr(np, aggfunc)(values, keepdims=True)[:0]
+            elif aggfunc in self.UFUNCS:
+                ordered = values[self.order]
+                if kind == 'b':
+                    ordered = ordered.astype('int')
+                reduced = self.UFUNCS[aggfunc].reduceat(ordered, starts)
+            elif aggfunc == 'median':
+                ordered = values[np.lexsort((values, self.codes))]
+                counts = self.counts[nonempty]
+                low = ordered[starts + (counts - 1) // 2]
+                high = ordered[starts + counts // 2]
+                reduced = (low + high) / 2
+                if kind == 'f':
+                    has_nan = np.bincount(self.codes, weights=np.isnan(values),
+                                          minlength=self.ngroups)[nonempty] > 0
+                    reduced[has_nan] = np.nan
+            else:
+                func = getattr(np, aggfunc)
+                ordered = values[self.order]
+                reduced = np.array([func(group) for group in np.split(ordered, starts[1:])])
+
+        result = np.zeros(self.ngroups, dtype=reduced.dtype)
+        result[nonempty] = reduced
+        return result
+
+    def _sorted_positions(self):
+        # position of every row of `order` within its group
+        return np.arange(len(self.codes)) - np.repeat(self.starts, self.counts)
+
+    def cumsum(self, values):
+        """
+        Cumulative sum within every group, from one cumulative sum over
+        the rows sorted by group minus the total of the preceding groups
+        """
+        missing = _missing(values)
+        ordered = values[self.order]
+        if missing.any():
+            ordered = np.where(missing[self.order], 0, ordered)
+        totals = np.cumsum(ordered)
+        before = np.repeat(totals[self.starts] - ordered[self.starts], self.counts)
+        result = np.empty_like(totals)
+        result[self.order] = totals - before
+        if missing.any():
+            result = result.astype('float')
+            result[missing] = np.nan
+        return result
+
+    def cumextreme(self, values, how):
+        """
+        Cumulative minimum or maximum within every group. Values are
+        replaced by their rank among the distinct values and offset by
+        their group, so that groups never overlap and a single
+        accumulation over the rows sorted by group restarts at every
+        group. Missing values are skipped
+        """
+        missing = _missing(values)
+        codes, uniques = _factorize(values[~missing])
+        width = len(uniques) + 1
+        ranks = np.zeros(len(values), dtype='int64')
+        if how == 'max':
+            ranks[~missing] = codes + 1
+            keys = self.codes.astype('int64') * width + ranks
+            accumulate = np.maximum.accumulate
+        else:
+            ranks[~missing] = codes
+            ranks[missing] = width - 1
+            keys = (self.ngroups - 1 - self.codes.astype('int64')) * width + ranks
+            accumulate = np.minimum.accumulate
+        running = np.empty(len(values), dtype='int64')
+        running[self.order] = accumulate(keys[self.order])
+        positions = running % width - (how == 'max')
+        # a group that starts with missing values has no extreme yet
+        missing = missing | (positions < 0) | (positions >= len(uniques))
+        return _take_or_missing(uniques, positions, missing)
+
+    def rank(self, values, ascending=True):
+        """
+        Average rank of every value within its group, from one sort by
+        group and value. Runs of equal values within a group get the
+        mean of their first and last position
+        """
+        missing = _missing(values)
+        codes, uniques = _factorize(values[~missing])
+        ranks = np.full(len(values), len(uniques), dtype='int64')
+        ranks[~missing] = codes if ascending else len(uniques) - 1 - codes
+        order = np.lexsort((ranks, self.codes))
+        group_codes = self.codes[order]
+        ranks = ranks[order]
+        positions = np.arange(1, len(values) + 1) - np.repeat(self.starts, self.counts)
+        new_run = np.ones(len(values), dtype='bool')
+        new_run[1:] = (group_codes[1:] != group_codes[:-1]) | (ranks[1:] != ranks[:-1])
+        run_starts = np.flatnonzero(new_run)
+        run_lengths = np.diff(np.append(run_starts, len(values)))
+        average = positions[run_starts] + (run_lengths - 1) / 2
+        result = np.empty(len(values))
+        result[order] = np.repeat(average, run_lengths)
+        result[missing] = np.nan
+        return result
+
+    def shift(self, values, n=1):
+        """
+        Values moved `n` rows down within every group, with missing
+        values for the rows shifted in from outside the group
+        """
+        positions = self._sorted_positions() - n
+        source = np.arange(len(values)) - n
+        outside = (positions < 0) | (positions >= np.repeat(self.counts, self.counts))
+        source = self.order[np.where(outside, 0, source)] if len(values) else source
+        missing = np.empty(len(values), dtype='bool')
+        missing[self.order] = outside
+        positions = np.empty(len(values), dtype=np.intp)
+        positions[self.order] = source
+        return _take_or_missing(values, positions, missing)
+
+
+def _join_indices(left_codes, right_codes, ngroups, how):
+    """
+    Row indices of the left and right side of every output row of a
+    join on shared key codes, with -1 for the side without a match.
+    The right rows of one code are contiguous in the order of their
+    groups, so each left row matches a slice of that order
+    """
+    right = _Groups(right_codes, ngroups)
+    left_idx, positions = _expand_matches(right.starts[left_codes],
+                                          right.counts[left_codes], how)
+    right_idx = np.where(positions >= 0, right.order[positions], -1) \
+        if len(right_codes) else positions
+    if how == 'outer':
+        left_counts = np.bincount(left_codes, minlength=ngroups)
+        extra = np.flatnonzero(left_counts[right_codes] == 0)
+        left_idx = np.concatenate([left_idx, np.full(len(extra), -1)])
+        right_idx = np.concatenate([right_idx, extra])
+    return left_idx, right_idx
+
+
+def _merge_join_indices(left_keys, right_keys, how):
+    """
+    Same as `_join_indices` for keys that are both sorted in ascending
+    order. The matches of every left key are the slice of right keys
+    between its leftmost and rightmost insertion points
+    """
+    starts = np.searchsorted(right_keys, left_keys, 'left')
+    matches = np.searchsorted(right_keys, left_keys, 'right') - starts
+    left_idx, right_idx = _expand_matches(starts, matches, how)
+    if how == 'outer':
+        extra = np.flatnonzero(np.searchsorted(left_keys, right_keys, 'left') ==
+                               np.searchsorted(left_keys, right_keys, 'right'))
+        left_idx = np.concatenate([left_idx, np.full(len(extra), -1)])
+        right_idx = np.concatenate([right_idx, extra])
+    return left_idx, right_idx
+
+
+def _expand_matches(starts, matches, how):
+    """
+    Repeats every left row once per match, or once with a position of
+    -1 when it has no match and `how` is not 'inner'. Returns the left
+    row indices and the positions start + offset of the matches
+    """
+    unmatched = matches == 0
+    if how != 'inner':
+        matches = np.where(unmatched, 1, matches)
+    left_idx = np.repeat(np.arange(len(starts)), matches)
+    offsets = np.arange(len(left_idx)) - np.repeat(np.cumsum(matches) - matches, matches)
+    positions = np.repeat(starts, matches) + offsets
+    if how != 'inner':
+        positions[np.repeat(unmatched, matches)] = -1
+    return left_idx, positions
+
+
+def _missing(values):
+    # boolean mask of the missing values of any array
+    kind = values.dtype.kind
+    if kind == 'f':
+        return np.isnan(values)
+    if kind == 'O':
+        return values == None
+    return np.zeros(len(values), dtype='bool')
+
+
+def _common_dtype(*dtypes):
+    # dtype able to hold values of all `dtypes`. Booleans only mix with
+    # other dtypes as objects, so that True does not silently become 1
+    kinds = {np.dtype(dtype).kind == 'b' for dtype in dtypes}
+    if len(kinds) > 1:
+        return np.dtype('O')
+    return np.result_type(*dtypes)
+
+
+def _nullable_dtype(dtype):
+    # dtype able to hold missing values: floats for integers and
+    # objects for booleans
+    if dtype.kind in 'iu':
+        return np.dtype('float64')
+    if dtype.kind == 'b':
+        return np.dtype('O')
+    return dtype
+
+
+def _missing_value(dtype):
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind in 'mM':
+        return np.array('NaT', dtype=dtype)
+    return None
+
+
+def _take_or_missing(values, indices, missing):
+    """
+    Takes `values` at `indices`, with NaN where `missing` is True, or
+    None for arrays of strings and booleans. Integers become floats when
+    anything is missing
+    """
+    result = values[np.where(missing, 0, indices)] if len(values) else \
+        np.empty(len(indices), dtype=values.dtype)
+    if missing.any():
+        if result.dtype.kind in 'iuf':
+            result = result.astype('float')
+            result[missing] = np.nan
+        else:
+            result = result.astype('O')
+            result[missing] = None
+    return result
+
+
+def _pivot_grid(groups, values, aggfunc, shape, fill_value, margins, row_codes, col_codes):
+    """
+    Aggregates `values` into a grid of shape (n_cols, n_rows) with one
+    cell per group of `groups`, filling the cells without rows with
+    `fill_value`. With `margins`, an extra row and column hold the
+    aggregates of every grid column and row, and the last cell the
+    aggregate of all values. Counts, sums, minimums, maximums, means
+    and variances of numbers are combined from the cell aggregates;
+    other aggregations are computed again over the row or column codes
+    """
+    n_cols, n_rows = shape
+    counts = groups.counts.reshape(shape)
+    empty = counts == 0
+    cells = groups.reduce(values, aggfunc).reshape(shape)
+    decomposable = aggfunc in ('size', 'count', 'sum', 'min', 'max', 'mean', 'var', 'std') \
+        and (values is None or values.dtype.kind in 'biuf')
+
+    def combine(axis):
+        if not decomposable:
+            if axis == 0:
+                return _Groups(row_codes, n_rows).reduce(values, aggfunc)
+            if axis == 1:
+                return _Groups(col_codes, n_cols).reduce(values, aggfunc)
+            return _Groups(np.zeros(len(row_codes), dtype=np.intp), 1).reduce(values, aggfunc)[0]
+        if aggfunc in ('size', 'count', 'sum'):
+            return cells.sum(axis)
+        if aggfunc in ('min', 'max'):
+            if cells.dtype.kind == 'f':
+                initial = np.inf if aggfunc == 'min' else -np.inf
+            else:
+                info = np.iinfo(cells.dtype)
+                initial = info.max if aggfunc == 'min' else info.min
+            ufunc = _Groups.UFUNCS[aggfunc]
+            return ufunc.reduce(cells, axis=axis, where=~empty, initial=initial)
+        n = counts.sum(axis)
+        sums = groups.reduce(values, 'sum').reshape(shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = sums.sum(axis) / n
+            if aggfunc == 'mean':
+                return mean
+            # pairwise combination of the sums of squared deviations
+            cell_var = cells ** 2 if aggfunc == 'std' else cells
+            shift = mean if axis is None else np.expand_dims(mean, axis)
+            m2 = np.where(empty, 0, counts * (cell_var + (sums / counts - shift) ** 2))
+            var = m2.sum(axis) / n
+        return var if aggfunc == 'var' else np.sqrt(var)
+
+    dtype = cells.dtype
+    if empty.any():
+        dtype = np.result_type(dtype, 'float' if fill_value is None else np.array([fill_value]).dtype)
+    if margins:
+        row_margin, col_margin, total = combine(0), combine(1), combine(None)
+        dtype = np.result_type(dtype, row_margin, col_margin, total)
+    grid = np.empty((n_cols + margins, n_rows + margins), dtype=dtype)
+    grid[:n_cols, :n_rows] = cells
+    if empty.any():
+        grid[:n_cols, :n_rows][empty] = np.nan if fill_value is None else fill_value
+    if margins:
+        grid[n_cols, :n_rows] = row_margin
+        grid[:n_cols, n_rows] = col_margin
+        grid[n_cols, n_rows] = total
+    return grid
+
+
+def _hash_array(values):
+    """
+    Hashes every element of `values` to a uint64 that is the same in
+    every process. Numbers are hashed from their bit pattern through the
+    splitmix64 mixer. Strings and other objects are hashed with BLAKE2b,
+    once per distinct value
+    """
+    kind = values.dtype.kind
+    if kind == 'O':
+        import hashlib
+        codes, uniques = _factorize(values, sort=False)
+        digests = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(b's' + value.encode() if isinstance(value, str)
+                                            else b'o' + repr(value).encode(),
+                                            digest_size=8).digest(), 'little')
+             for value in uniques), dtype='uint64', count=len(uniques))
+        return digests[codes]
+    if kind == 'f':
+        # -0.0 and 0.0 are equal so they must share a bit pattern, and
+        # so must all NaNs
+        values = values.astype('float64') + 0.0
+        values[np.isnan(values)] = np.nan
+        bits = values.view('uint64')
+    elif kind in 'iub':
+        bits = values.astype('int64').view('uint64')
+    else:
+        bits = values.view('int64').view('uint64')
+    return _mix64(bits)
+
+
+def _mix64(x):
+    # the splitmix64 finalizer, wrapping around on overflow
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _isin(values, targets):
+    """
+    Vectorized membership test of `values` in `targets`
+
+    Integers spanning a small range are looked up in a direct-address
+    table. Object columns are factorized in a single dict pass, so only
+    their distinct values are looked up among the targets, with the
+    exact equality of Python objects. Everything else is a binary
+    search into the sorted distinct targets, or a merge of both sides
+    when there are more targets than values.
+    """
+    if len(values) == 0 or len(targets) == 0:
+        return np.zeros(len(values), dtype='bool')
+
+    kind = values.dtype.kind
+    if kind == 'O':
+        codes, uniques = _factorize(values, sort=False)
+        targets = set(targets.tolist())
+        found = np.array([unique in targets for unique in uniques], dtype='bool')
+        return found[codes]
+
+    if kind in 'iu' and targets.dtype.kind in 'iu':
+        low, high = values.min(), values.max()
+        span = int(high) - int(low)
+        if span <= max(len(values), 2 ** 16):
+            targets = targets[(targets >= low) & (targets <= high)]
+            table = np.zeros(span + 1, dtype='bool')
+            if kind == 'i':
+                values, targets = values.astype('int64'), targets.astype('int64')
+            table[targets.astype(values.dtype) - low] = True
+            return table[values - low]
+
+    if len(targets) > len(values):
+        return np.isin(values, targets)
+    uniques = np.unique(targets)
+    positions = np.searchsorted(uniques, values)
+    positions[positions == len(uniques)] = 0
+    return uniques[positions] == values
+
+
+def _argsort(values, asc=True, kind='stable'):
+    """
+    Argsort in either direction. Descending order sorts the reversed
+    array and reverses the result back so ties keep their row order
+    """
+    if asc:
+        return np.argsort(values, kind=kind)
+    return len(values) - 1 - np.argsort(values[::-1], kind=kind)[::-1]
+
+
+def _lexsort_order(keys, ascending):
+    """
+    Stable row order for several sort keys, most significant first.
+    Each key is sorted with its own direction, least significant first
+    """
+    order = np.arange(len(keys[0]))
+    for values, asc in zip(keys[::-1], ascending[::-1]):
+        order = order[_argsort(values[order], asc)]
+    return order
+
+
+class _EvalNode:
+    """
+    One node of a parsed `DataFrame.eval` expression. Leaves hold a
+    column or a constant, inner nodes hold the ufunc of their operator
+    and a block-sized buffer that the ufunc writes into with `out=`
+    """
+
+    BINOPS = {'Add': np.add, 'Sub': np.subtract, 'Mult': np.multiply,
+              'Div': np.true_divide, 'FloorDiv': np.floor_divide,
+              'Mod': np.remainder, 'Pow': np.power,
+              'BitAnd': np.bitwise_and, 'BitOr': np.bitwise_or,
+              'BitXor': np.bitwise_xor}
+    CMPOPS = {'Gt': np.greater, 'Lt': np.less, 'GtE': np.greater_equal,
+              'LtE': np.less_equal, 'Eq': np.equal, 'NotEq': np.not_equal}
+    UNARYOPS = {'USub': np.negative, 'UAdd': np.positive, 'Invert': np.invert}
+
+    def __init__(self, ufunc=None, children=(), values=None):
+        self.ufunc = ufunc
+        self.children = children
+        self.values = values
+        self.dtype = None
+        self.buffer = None
+
+    @classmethod
+    def build(cls, node, data):
+        import ast
+        if isinstance(node, ast.Name):
+            if node.id not in data:
+                raise KeyError(f'Column `{node.id}` does not exist')
+            return cls(values=data[node.id])
+        # before Python 3.8 literals parse as `Num` and `NameConstant`
+        legacy = type(node).__name__ in ('Num', 'NameConstant')
+        if isinstance(node, ast.Constant) or legacy:
+            value = node.n if type(node).__name__ == 'Num' else node.value
+            if not isinstance(value, (int, float, bool)):
+                raise TypeError('Only numeric constants are allowed in `expr`')
+            return cls(values=value)
+        if isinstance(node, ast.BinOp):
+            ufunc = cls.BINOPS.get(type(node.op).__name__)
+            children = (node.left, node.right)
+        elif isinstance(node, ast.UnaryOp):
+            ufunc = cls.UNARYOPS.get(type(node.op).__name__)
+            children = (node.operand,)
+        elif isinstance(node, ast.Compare):
+            if len(node.ops) != 1:
+                raise ValueError('Chained comparisons are not supported')
+            ufunc = cls.CMPOPS.get(type(node.ops[0]).__name__)
+            children = (node.left, node.comparators[0])
+        else:
+            raise ValueError(f'Unsupported syntax `{type(node).__name__}` in `expr`')
+        if ufunc is None:
+            raise ValueError('Unsupported operator in `expr`')
+        return cls(ufunc, tuple(cls.build(child, data) for child in children))
+
+    def allocate(self, size):
+        # the root writes straight into the output so only children get buffers
+        for child in self.children:
+            if child.ufunc is not None:
+                child.buffer = np.empty(size, dtype=child.dtype)
+                child.allocate(size)
+
+    def operand(self, start, stop):
+        if self.ufunc is None:
+            if isinstance(self.values, np.ndarray):
+                return self.values[start:stop]
+            return self.values
+        out = None if self.buffer is None else self.buffer[:stop - start]
+        return self.evaluate(start, stop, out)
+
+    def evaluate(self, start, stop, out=None):
+        args = [child.operand(start, stop) for child in self.children]
+        result = self.ufunc(*args, out=out)
+        self.dtype = result.dtype
+        return result
+
+
+def concat(frames):
+    """
+    Stacks the rows of several DataFrames
+
+    The length of the result and a common dtype for every column are
+    found first, so every column is written once into a preallocated
+    array. Columns absent from some DataFrames are missing for their
+    rows: NaN for numbers and None for strings and booleans
+
+    Parameters
+    ----------
+    frames: list of DataFrames
+
+    Returns
+    -------
+    A DataFrame with the columns of all DataFrames in order of first
+    appearance
+    """
+    frames = list(frames)
+    if not frames or not all(isinstance(df, DataFrame) for df in frames):
+        raise TypeError('`frames` must be a non-empty list of DataFrames')
+    total = sum(len(df) for df in frames)
+    dtypes = {}
+    for df in frames:
+        for col, values in df._data.items():
+            dtypes.setdefault(col, []).append(values.dtype)
+
+    new_data = {}
+    for col, col_dtypes in dtypes.items():
+        dtype = _common_dtype(*col_dtypes)
+        if any(len(df) and col not in df._data for df in frames):
+            dtype = _nullable_dtype(dtype)
+        buffer = np.empty(total, dtype=dtype)
+        start = 0
+        for df in frames:
+            stop = start + len(df)
+            values = df._data.get(col)
+            buffer[start:stop] = _missing_value(dtype) if values is None else values
+            start = stop
+        new_data[col] = buffer
+    return DataFrame(new_data)
+
+
+def merge_asof(left, right, on, by=None, direction='backward', tolerance=None,
+               suffixes=('_x', '_y')):
+    """
+    Joins every row of `left` with the row of `right` with the nearest
+    value in the `on` column, among the rows with equal values in the
+    `by` columns
+
+    The `by` keys of both DataFrames are factorized into shared codes
+    and the `on` values into shared ranks, which are combined into one
+    integer key that sorts by group first. After one sort of the right
+    keys, every left row is matched by a single `np.searchsorted`
+    followed by a check that the row found is in the same group
+
+    Parameters
+    ----------
+    left: DataFrame
+    right: DataFrame
+    on: str of column name in both DataFrames, such as a time, without
+        missing values
+    by: str or list of column names in both DataFrames, optional
+    direction: 'backward', 'forward' or 'nearest'
+        'backward' matches the last right row whose `on` value is less
+        than or equal to the left one, 'forward' the first one greater
+        than or equal to it and 'nearest' the closer of those two,
+        preferring 'backward' on ties
+    tolerance: number, optional maximum distance between the `on`
+        values of matched rows
+    suffixes: tuple of two str appended to the names of the columns
+        present in both DataFrames other than `on` and `by`
+
+    Returns
+    -------
+    A DataFrame with the rows of `left` in their order, followed by
+    the columns of `right` other than `on` and `by`, which are missing
+    where there is no match
+    """
+    if not isinstance(left, DataFrame) or not isinstance(right, DataFrame):
+        raise TypeError('`left` and `right` must be DataFrames')
+    if by is None:
+        by = []
+    elif isinstance(by, str):
+        by = [by]
+    elif not isinstance(by, list):
+        raise TypeError('`by` must be a str or a list')
+    for col in [on] + by:
+        if col not in left._data or col not in right._data:
+            raise KeyError(f'Column `{col}` must be in both DataFrames')
+    if direction not in ('backward', 'forward', 'nearest'):
+        raise ValueError("`direction` must be 'backward', 'forward' or 'nearest'")
+
+    n_left = len(left)
+    times = np.concatenate([left._data[on], right._data[on]])
+    if _missing(times).any():
+        raise ValueError(f'Column `{on}` cannot have missing values')
+    ranks, uniques = _factorize(times)
+    if by:
+        codes, _, _ = _factorize_keys([np.concatenate([left._data[col], right._data[col]])
+                                       for col in by], sort=False)
+    else:
+        codes = np.zeros(len(times), dtype=np.intp)
+    keys = codes.astype('int64') * len(uniques) + ranks
+    left_keys, left_codes = keys[:n_left], codes[:n_left]
+    order = np.argsort(keys[n_left:], kind='stable')
+    right_keys, right_codes = keys[n_left:][order], codes[n_left:][order]
+    left_on, right_on = left._data[on], right._data[on][order]
+
+    def search(side):
+        # position in `order` of the match in one direction, or -1
+        if side == 'backward':
+            positions = np.searchsorted(right_keys, left_keys, 'right') - 1
+        else:
+            positions = np.searchsorted(right_keys, left_keys, 'left')
+        clipped = np.clip(positions, 0, len(right_keys) - 1)
+        found = (positions == clipped) & (right_codes[clipped] == left_codes)
+        return np.where(found, positions, -1)
+
+    if len(right_keys) == 0:
+        positions = np.full(n_left, -1)
+    elif direction == 'nearest':
+        backward, forward = search('backward'), search('forward')
+        use_forward = (backward < 0) | (forward >= 0) & \
+            (right_on[forward] - left_on < left_on - right_on[backward])
+        positions = np.where(use_forward, forward, backward)
+    else:
+        positions = search(direction)
+    if tolerance is not None and len(right_keys) > 0:
+        too_far = np.abs(left_on - right_on[positions]) > tolerance
+        positions[too_far] = -1
+    right_idx = np.where(positions >= 0, order[positions], -1) if len(right_keys) > 0 else positions
+
+    new_data = {}
+    for col, values in left._data.items():
+        name = col + suffixes[0] if col not in by and col != on and col in right._data else col
+        new_data[name] = values.copy()
+    for col, values in right._data.items():
+        if col not in by and col != on:
+            name = col + suffixes[1] if col in left._data else col
+            new_data[name] = _take_or_missing(values, right_idx, right_idx < 0)
+    return DataFrame(new_data)
+
+
+def read_csv(fn, chunksize=None):
     """
     Read in a comma-separated value file as a DataFrame
 
     Parameters
     ----------
     fn: string of file location
+    chunksize: int, optional
+        If given, the file is read lazily and an iterator of DataFrames
+        of at most `chunksize` rows is returned instead
 
     Returns
     -------
-    A DataFrame
+    A DataFrame, or an iterator of DataFrames
     """
+    if chunksize is not None:
+        if not isinstance(chunksize, int) or chunksize < 1:
+            raise ValueError('`chunksize` must be a positive int')
+        return _read_csv_chunks(fn, chunksize)
+
     from collections import defaultdict
     values = defaultdict(list)
     with open(fn) as f:
@@ -943,6 +3739,29 @@ def read_csv(fn):
             vals = line.strip('\n').split(',')
             for val, name in zip(vals, column_names):
                 values[name].append(val)
+    return _convert_csv_values(values)
+
+
+def _read_csv_chunks(fn, chunksize):
+    with open(fn) as f:
+        header = f.readline()
+        column_names = header.strip('\n').split(',')
+        values = {name: [] for name in column_names}
+        n_rows = 0
+        for line in f:
+            vals = line.strip('\n').split(',')
+            for val, name in zip(vals, column_names):
+                values[name].append(val)
+            n_rows += 1
+            if n_rows == chunksize:
+                yield _convert_csv_values(values)
+                values = {name: [] for name in column_names}
+                n_rows = 0
+        if n_rows:
+            yield _convert_csv_values(values)
+
+
+def _convert_csv_values(values):
     new_data = {}
     for col, vals in values.items():
         try:
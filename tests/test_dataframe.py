@@ -338,6 +338,32 @@ class TestAggregation:
         assert_df_equals(df_result, df_answer)
 
 
+class TestOptions:
+
+    def test_set_option(self):
+        with pytest.raises(KeyError):
+            pdc.set_option('cores', 2)
+        with pytest.raises(ValueError):
+            pdc.set_option('workers', 0)
+
+    def test_parallel_columns(self):
+        df_temp = pdc.DataFrame({'a': np.arange(10.), 'b': np.arange(10),
+                                 'c': np.array(list('abcdefghij'))})
+        serial = [df_temp.sum(), df_temp.cumsum(), df_temp * 2]
+        pdc.set_option('workers', 4)
+        pdc.set_option('parallel_threshold', 0)
+        try:
+            assert pdc.get_option('workers') == 4
+            parallel = [df_temp.sum(), df_temp.cumsum(), df_temp * 2]
+            with pytest.raises(TypeError):
+                df_temp - 1
+        finally:
+            pdc.set_option('workers', 1)
+            pdc.set_option('parallel_threshold', 1_000_000)
+        for df_result, df_answer in zip(parallel, serial):
+            assert_df_equals(df_result, df_answer)
+
+
 a3 = np.array(['a', None, 'c'])
 b3 = np.array([11, 5, 8])
 c3 = np.array([3.4, np.nan, 5.1])
@@ -358,6 +384,67 @@ class TestOtherMethods:
                                    'c': np.array([False, True, False])})
         assert_df_equals(df_result, df_answer)
 
+    def test_isin(self):
+        df_result = df3.isin('a', ['c', None])
+        df_answer = pdc.DataFrame({'a': np.array([False, True, True])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df3.isin('b', [5, 8, 100])
+        df_answer = pdc.DataFrame({'b': np.array([False, True, True])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df3.isin('c', np.array([5.1, 0, 1, 2, 3]))
+        df_answer = pdc.DataFrame({'c': np.array([False, False, True])})
+        assert_df_equals(df_result, df_answer)
+
+        df_temp = pdc.DataFrame({'a': np.array([1, 'a', None], dtype='O')})
+        df_result = df_temp.isin('a', ['1', 'a'])
+        df_answer = pdc.DataFrame({'a': np.array([False, True, False])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.isin('a', [1, None])
+        df_answer = pdc.DataFrame({'a': np.array([True, False, True])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df3[df3.isin('b', {11, 8})]
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'c'], dtype='O'),
+                                   'b': np.array([11, 8]),
+                                   'c': np.array([3.4, 5.1])})
+        assert_df_equals(df_result, df_answer)
+
+    def test_bitmap_index(self):
+        df_temp = pdc.DataFrame({'g': np.array(['m', 'f', 'f', None, 'm', 'f']),
+                                 'r': np.array([1, 2, 1, 1, 2, 2])})
+        df_temp.create_bitmap_index('g')
+        df_temp.create_bitmap_index('r')
+
+        df_result = df_temp['g'] == 'f'
+        df_answer = pdc.DataFrame({'g': np.array([False, True, True, False, False, True])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp['r'] != 2
+        df_answer = pdc.DataFrame({'r': np.array([True, False, True, True, False, False])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.isin('g', ['m', None])
+        df_answer = pdc.DataFrame({'g': np.array([True, False, False, True, True, False])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.bitmap_mask({'g': 'f', 'r': [2, 3]})
+        df_answer = pdc.DataFrame({'mask': np.array([False, True, False, False, False, True])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.bitmap_mask({'g': 'm', 'r': 1}, how='or')
+        df_answer = pdc.DataFrame({'mask': np.array([True, False, True, True, True, False])})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(ValueError):
+            df_temp.create_bitmap_index('r', max_cardinality=1)
+
+        df_temp['r'] = np.array([5, 5, 5, 5, 5, 5])
+        with pytest.raises(KeyError):
+            df_temp.bitmap_mask({'r': 5})
+
     def test_count(self):
         df_result = df3.count()
         df_answer = pdc.DataFrame({'a': np.array([2]),
@@ -378,6 +465,51 @@ class TestOtherMethods:
                                    'c': np.array([2])})
         assert_df_equals(df_result, df_answer)
 
+    def test_describe(self):
+        df_result = df3.describe()
+        c = np.array([3.4, 5.1])
+        df_answer = pdc.DataFrame({'statistic': np.array(['count', 'null_count', 'mean', 'std', 'min',
+                                                          '25%', '50%', '75%', 'max'], dtype='O'),
+                                   'b': np.array([3, 0, 8, np.std(b3), 5,
+                                                  *np.percentile(b3, [25, 50, 75]), 11]),
+                                   'c': np.array([2, 1, 4.25, np.std(c), 3.4,
+                                                  *np.percentile(c, [25, 50, 75]), 5.1])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df42.describe(percentiles=[.1])
+        assert df_result._data['statistic'][5] == '10%'
+        assert_array_equal(df_result._data['a'][5], np.percentile(a42, 10))
+
+    def test_approx_nunique(self):
+        df_result = df4.approx_nunique()
+        df_answer = pdc.DataFrame({'a': np.array([2]),
+                                   'b': np.array([2]),
+                                   'c': np.array([2])})
+        assert_df_equals(df_result, df_answer)
+
+        values = np.arange(100_000) % 30_000
+        sketch1 = pdc.HyperLogLog(error=.01)
+        sketch2 = pdc.HyperLogLog(error=.01)
+        sketch1.update(values[:50_000])
+        sketch2.update(values[50_000:])
+        sketch1.merge(sketch2)
+        assert abs(sketch1.estimate() - 30_000) < 30_000 * .04
+
+    def test_approx_quantile(self):
+        df_result = df3.approx_quantile(.5)
+        df_answer = pdc.DataFrame({'b': np.array([8.]), 'c': np.array([3.4])})
+        assert_df_equals(df_result, df_answer)
+
+        values = np.random.RandomState(0).normal(size=200_000)
+        sketch1 = pdc.QuantileSketch(k=400)
+        sketch2 = pdc.QuantileSketch(k=400)
+        sketch1.update(values[:100_000])
+        sketch2.update(values[100_000:])
+        sketch1.merge(sketch2)
+        result = sketch1.quantile(np.array([.1, .5, .9]))
+        ranks = np.searchsorted(np.sort(values), result) / len(values)
+        assert_array_equal(np.abs(ranks - [.1, .5, .9]) < .02, True)
+
     def test_rename(self):
         df_result = df4.rename({'a': 'A', 'c': 'C'})
         df_answer = pdc.DataFrame({'A': a4, 'b': b4, 'C': c4})
@@ -446,6 +578,99 @@ class TestNonAgg:
                                    'b': np.array([np.nan, 1.7 / 3.4, -11.1 / 5.1])})
         assert_df_equals(df_result, df_answer)
 
+    def test_rolling(self):
+        df_temp = pdc.DataFrame({'a': np.array([1, 3, np.nan, 4, 8, 6]),
+                                 'b': np.array([1, 3, 2, 4, 8, 6]),
+                                 'c': np.array(list('abcdef'))})
+        roll = df_temp.rolling(3, min_periods=2)
+        nan = np.nan
+        assert_df_equals(roll.sum(), pdc.DataFrame({'a': np.array([nan, 4, 4, 7, 12, 18]),
+                                                    'b': np.array([nan, 4, 6, 9, 14, 18.])}))
+        assert_df_equals(roll.mean(), pdc.DataFrame({'a': np.array([nan, 2, 2, 3.5, 6, 6]),
+                                                     'b': np.array([nan, 2, 2, 3, 14 / 3, 6])}))
+        df_result = roll.var()
+        assert_array_equal(np.isnan(df_result._data['a']), [True] + [False] * 5)
+        np.testing.assert_allclose(df_result._data['a'][1:], [1, 1, .25, 4, 8 / 3], atol=1e-12)
+        assert_df_equals(roll.min(), pdc.DataFrame({'a': np.array([nan, 1, 1, 3, 4, 4]),
+                                                    'b': np.array([nan, 1, 1, 2, 2, 4.])}))
+        assert_df_equals(df_temp.rolling(2).max(),
+                         pdc.DataFrame({'a': np.array([nan, 3, nan, nan, 8, 8]),
+                                        'b': np.array([nan, 3, 3, 4, 8, 8.])}))
+
+        # windows longer than the DataFrame
+        roll = df_temp.rolling(10, min_periods=1)
+        assert_df_equals(roll.max(), pdc.DataFrame({'a': np.array([1, 3, 3, 4, 8, 8.]),
+                                                    'b': np.array([1, 3, 3, 4, 8, 8.])}))
+        assert_df_equals(roll.min(), pdc.DataFrame({'a': np.array([1, 1, 1, 1, 1, 1.]),
+                                                    'b': np.array([1, 1, 1, 1, 1, 1.])}))
+
+        # a large early value must not leak into later windows
+        df_temp = pdc.DataFrame({'a': np.array([1e8, 1e8, 1, 2, 4, 4, 4, 7])})
+        df_result = df_temp.rolling(3, min_periods=1).std()
+        np.testing.assert_allclose(df_result._data['a'][4:],
+                                   [np.std([1, 2, 4]), np.std([2, 4, 4]), 0, np.std([4, 4, 7])],
+                                   rtol=1e-12, atol=0)
+        assert df_result._data['a'][0] == 0
+
+        with pytest.raises(ValueError):
+            df_temp.rolling(2, min_periods=3)
+
+    def test_expanding(self):
+        df_temp = pdc.DataFrame({'a': np.array([1, 3, np.nan, 5, 8]),
+                                 'c': np.array(list('abcde'))})
+        nan = np.nan
+        expanding = df_temp.expanding(min_periods=2)
+        assert_df_equals(expanding.mean(), pdc.DataFrame({'a': np.array([nan, 2, 2, 3, 4.25])}))
+        np.testing.assert_allclose(expanding.var()._data['a'],
+                                   [nan, 1, 1, 8 / 3, 6.6875], atol=1e-12)
+
+        first = pdc.DataFrame({'a': np.array([1, 3.])}).expanding()
+        second = first.update(pdc.DataFrame({'a': np.array([nan, 5, 8])}))
+        np.testing.assert_allclose(second.var(ddof=1)._data['a'], [2, 4, 26.75 / 3], atol=1e-12)
+
+        first = pdc.DataFrame({'a': np.array([nan, nan])}).expanding()
+        second = first.update(pdc.DataFrame({'a': np.array([1, 2, 3.])}))
+        assert_df_equals(second.mean(), pdc.DataFrame({'a': np.array([1, 1.5, 2])}))
+
+    def test_ewm(self):
+        values = np.array([3, np.nan, 5, 1, 8, 2.])
+        df_temp = pdc.DataFrame({'a': values})
+        for adjust in [True, False]:
+            mean_answer = []
+            var_answer = []
+            for t in range(len(values)):
+                weights = np.array([.7 ** (t - i) for i in range(t + 1)])
+                if not adjust:
+                    weights[1:] *= .3
+                weights[np.isnan(values[:t + 1])] = 0
+                x = np.nan_to_num(values[:t + 1])
+                mean = (weights * x).sum() / weights.sum()
+                mean_answer.append(mean)
+                var_answer.append((weights * (x - mean) ** 2).sum() / weights.sum())
+            ewm = df_temp.ewm(alpha=.3, adjust=adjust)
+            np.testing.assert_allclose(ewm.mean()._data['a'], mean_answer)
+            np.testing.assert_allclose(ewm.var(bias=True)._data['a'], var_answer, atol=1e-12)
+
+            first = pdc.DataFrame({'a': values[:3]}).ewm(alpha=.3, adjust=adjust)
+            second = first.update(pdc.DataFrame({'a': values[3:]}))
+            result = np.concatenate([first.var()._data['a'], second.var()._data['a']])
+            np.testing.assert_allclose(result, ewm.var()._data['a'])
+
+        # a large first value must not cancel out the later variance
+        values = np.concatenate([[1e8], np.tile([1, 2, 4.], 100)])
+        var_answer = []
+        for t in range(len(values)):
+            weights = .7 ** np.arange(t, -1, -1)
+            mean = (weights * values[:t + 1]).sum() / weights.sum()
+            var_answer.append((weights * (values[:t + 1] - mean) ** 2).sum() / weights.sum())
+        first = pdc.DataFrame({'a': values[:1]}).ewm(alpha=.3)
+        second = first.update(pdc.DataFrame({'a': values[1:]}))
+        np.testing.assert_allclose(second.var(bias=True)._data['a'], var_answer[1:], rtol=1e-6)
+
+        assert_df_equals(df_temp.ewm(span=3).mean(), df_temp.ewm(alpha=.5).mean())
+        with pytest.raises(ValueError):
+            df_temp.ewm(alpha=.5, span=3)
+
 
 a5 = np.array([11, 5])
 b5 = np.array([3.4, 5.1])
@@ -533,6 +758,26 @@ class TestOperators:
         df_answer = pdc.DataFrame({'a': a5 != 2, 'b': b5 != 2})
         assert_df_equals(df_result, df_answer)
 
+    def test_eval(self):
+        df_result = df5.eval('(a * 2 + b) / 3')
+        df_answer = pdc.DataFrame({'(a * 2 + b) / 3': (a5 * 2 + b5) / 3})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df5.eval('c = -a > b')
+        df_answer = pdc.DataFrame({'a': a5, 'b': b5, 'c': -a5 > b5})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(KeyError):
+            df5.eval('a + z')
+
+    def test_eval_blocks(self):
+        a = np.arange(200_000)
+        b = np.random.rand(200_000)
+        df_temp = pdc.DataFrame({'a': a, 'b': b})
+        df_result = df_temp.eval('(a * 2 + b) / 3 - a % 7')
+        df_answer = pdc.DataFrame({'(a * 2 + b) / 3 - a % 7': (a * 2 + b) / 3 - a % 7})
+        assert_df_equals(df_result, df_answer)
+
 
 a6 = np.array(['b', 'c', 'a', 'a', 'b'])
 b6 = np.array([3.4, 5.1, 2, 1, 6])
@@ -555,7 +800,7 @@ class TestMoreMethods:
     def test_sort_values_desc(self):
         df_result = df6.sort_values('a', asc=False)
         a = np.array(['c', 'b', 'b', 'a', 'a'])
-        b = np.array([5.1, 6, 3.4, 1,2])
+        b = np.array([5.1, 3.4, 6, 2, 1])
         df_answer = pdc.DataFrame({'a': a, 'b': b})
         assert_df_equals(df_result, df_answer)
 
@@ -573,6 +818,27 @@ class TestMoreMethods:
         df_answer = pdc.DataFrame({'a': a[::-1], 'b': b[::-1]})
         assert_df_equals(df_result, df_answer)
 
+    def test_sort_values_mixed(self):
+        df_result = df7.sort_values(['a', 'b'], asc=[True, False])
+        a = np.array(['a', 'a', 'a', 'b', 'b'])
+        b = np.array([5.1, 2, 1, 6, 3.4])
+        df_answer = pdc.DataFrame({'a': a, 'b': b})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(ValueError):
+            df7.sort_values(['a', 'b'], asc=[True])
+
+    def test_sort_values_int_keys(self):
+        df_temp = pdc.DataFrame({'e': np.array([3, -1, 3, 2, -1]),
+                                 'f': np.arange(5)})
+        df_result = df_temp.sort_values('e')
+        df_answer = pdc.DataFrame({'e': np.array([-1, -1, 2, 3, 3]),
+                                   'f': np.array([1, 4, 3, 0, 2])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.sort_values('e', asc=False, kind='quicksort')
+        assert_array_equal(df_result._data['e'], np.array([3, 3, 2, -1, -1]))
+
     def test_sample(self):
         df_result = df7.sample(2, seed=1)
         df_answer = pdc.DataFrame({'a': np.array(['a', 'a'], dtype=object),
@@ -590,6 +856,53 @@ class TestMoreMethods:
         with pytest.raises(ValueError):
             df7.sample(frac=-2)
 
+    def test_nlargest(self):
+        df_result = df7.nlargest(2, 'b')
+        df_answer = pdc.DataFrame({'a': np.array(['b', 'a'], dtype=object),
+                                   'b': np.array([6, 5.1])})
+        assert_df_equals(df_result, df_answer)
+
+        df_temp = pdc.DataFrame({'c': np.array([1, 3, 3, 2, 3]),
+                                 'd': np.array([0, 1, 5, 2, 1])})
+        df_result = df_temp.nlargest(2, 'c')
+        df_answer = pdc.DataFrame({'c': np.array([3, 3]), 'd': np.array([1, 5])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.nlargest(2, ['c', 'd'])
+        df_answer = pdc.DataFrame({'c': np.array([3, 3]), 'd': np.array([5, 1])})
+        assert_df_equals(df_result, df_answer)
+
+        # missing tiebreak values lose in both directions
+        df_temp = pdc.DataFrame({'k': np.array([5, 5, 5, 1]),
+                                 'f': np.array([2, np.nan, 1, 9])})
+        df_result = df_temp.nlargest(2, ['k', 'f'])
+        df_answer = pdc.DataFrame({'k': np.array([5, 5]), 'f': np.array([2, 1.])})
+        assert_df_equals(df_result, df_answer)
+        df_result = df_temp.nsmallest(3, ['k', 'f'])
+        df_answer = pdc.DataFrame({'k': np.array([1, 5, 5]), 'f': np.array([9, 1, 2.])})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(TypeError):
+            df7.nlargest(2, 'a')
+
+    def test_nsmallest(self):
+        df_result = df7.nsmallest(2, 'b')
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'a'], dtype=object),
+                                   'b': np.array([1, 2.])})
+        assert_df_equals(df_result, df_answer)
+
+        df_temp = pdc.DataFrame({'c': np.array([np.nan, 3, 1, 2])})
+        df_result = df_temp.nsmallest(10, 'c')
+        df_answer = pdc.DataFrame({'c': np.array([1, 2, 3.])})
+        assert_df_equals(df_result, df_answer)
+
+        df_temp = pdc.DataFrame({'k': np.array([1, 1, 1, 2]),
+                                 's': np.array(['b', None, 'a', 'c'], dtype=object)})
+        df_result = df_temp.nsmallest(2, ['k', 's'])
+        df_answer = pdc.DataFrame({'k': np.array([1, 1]),
+                                   's': np.array(['a', 'b'], dtype=object)})
+        assert_df_equals(df_result, df_answer)
+
 
 a8 = np.array(['b', 'a', 'a', 'a', 'b', 'a', 'a', 'b'])
 b8 = np.array(['B', 'A', 'A', 'A', 'B', 'B', 'B', 'A'])
@@ -611,6 +924,65 @@ class TestGrouping:
                                    'count': np.array([5, 3])})
         assert_df_equals(df_results[1], df_answer)
 
+    def test_value_counts_unsorted(self):
+        df_temp = pdc.DataFrame({'state': np.array(['texas', 'ohio', 'texas', 'florida', 'florida']),
+                                 'num': np.array([3, 1, 3, 2, 1])})
+        df_temp.create_bitmap_index('state')
+        df_results = df_temp.value_counts(sort=False)
+        df_answer = pdc.DataFrame({'state': np.array(['texas', 'ohio', 'florida'], dtype=object),
+                                   'count': np.array([2, 1, 2])})
+        assert_df_equals(df_results[0], df_answer)
+        df_answer = pdc.DataFrame({'num': np.array([3, 1, 2]),
+                                   'count': np.array([2, 2, 1])})
+        assert_df_equals(df_results[1], df_answer)
+
+        df_result = df_temp.value_counts(columns=['state', 'num'])
+        df_answer = pdc.DataFrame({'state': np.array(['texas', 'ohio', 'florida', 'florida'], dtype=object),
+                                   'num': np.array([3, 1, 2, 1]),
+                                   'count': np.array([2, 1, 1, 1])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp['state'].unique(sort=False)
+        df_answer = pdc.DataFrame({'state': np.array(['texas', 'ohio', 'florida'], dtype=object)})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp['state'].unique()
+        df_answer = pdc.DataFrame({'state': np.array(['florida', 'ohio', 'texas'], dtype=object)})
+        assert_df_equals(df_result, df_answer)
+
+    def test_drop_duplicates(self):
+        df_temp = pdc.DataFrame({'a': np.array(['x', 'y', 'x', 'x', 'y']),
+                                 'b': np.array([1, 2, 1, 3, 2]),
+                                 'c': np.array([1.5, 2.5, 3.5, 4.5, 5.5])})
+        df_result = df_temp.duplicated(['a', 'b'])
+        df_answer = pdc.DataFrame({'duplicated': np.array([False, False, True, False, True])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.drop_duplicates(['a', 'b'], keep='last')
+        df_answer = pdc.DataFrame({'a': np.array(['x', 'x', 'y']),
+                                   'b': np.array([1, 3, 2]),
+                                   'c': np.array([3.5, 4.5, 5.5])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.drop_duplicates('a', keep=False)
+        assert len(df_result) == 0
+        assert_df_equals(df_temp.drop_duplicates(), df_temp)
+
+    def test_hash_rows(self):
+        df_temp = pdc.DataFrame({'a': np.array([1, 2, 1]),
+                                 'b': np.array(['x', 'y', 'x']),
+                                 'c': np.array([np.nan, -0., 0.])})
+        hashes = df_temp.hash_rows(['a', 'b'])
+        assert hashes.dtype == np.uint64
+        assert hashes[0] == hashes[2] != hashes[1]
+        # hashes do not depend on the process
+        assert df_temp.hash_rows('a')[0] == 6791897765849424158
+        assert df_temp.hash_rows('c')[1] == df_temp.hash_rows('c')[2]
+
+        df_swapped = pdc.DataFrame({'a': np.array([1, 2]), 'b': np.array([2, 1])})
+        hashes = df_swapped.hash_rows()
+        assert hashes[0] != hashes[1]
+
     def test_value_counts_normalize(self):
         df_temp = pdc.DataFrame({'state': np.array(['texas', 'texas', 'texas', 'florida', 'florida', 'florida', 'florida', 'ohio']),
                                  'fruit': np.array(['a', 'a', 'a', 'a', 'b', 'b', 'b', 'a'])})
@@ -650,6 +1022,204 @@ class TestGrouping:
                                    'B': np.array([13., 6.])})
         assert_df_equals(df_result, df_answer)
 
+    def test_pivot_table_aggfuncs(self):
+        df_result = df8.pivot_table(rows='a', values='c', aggfunc='median')
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'b'], dtype=object),
+                                   'median': np.array([4., 5.])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df8.pivot_table(rows='a', columns='b', values='c', aggfunc='max')
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'b'], dtype=object),
+                                   'A': np.array([4, 8]),
+                                   'B': np.array([7, 5])})
+        assert_df_equals(df_result, df_answer)
+
+        df_temp = pdc.DataFrame({'a': np.array(['x', 'x', 'y']),
+                                 'b': np.array(['P', 'Q', 'P']),
+                                 'c': np.array([1, 2, 3])})
+        df_result = df_temp.pivot_table(rows='a', columns='b', values='c', aggfunc='mean')
+        df_answer = pdc.DataFrame({'a': np.array(['x', 'y'], dtype=object),
+                                   'P': np.array([1., 3.]),
+                                   'Q': np.array([2., np.nan])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_temp.pivot_table(rows='a', columns='b', values='c',
+                                        aggfunc=['sum', 'count'], fill_value=0, margins=True)
+        df_answer = pdc.DataFrame({'a': np.array(['x', 'y', 'All'], dtype=object),
+                                   'c_sum_P': np.array([1, 3, 4]),
+                                   'c_sum_Q': np.array([2, 0, 2]),
+                                   'c_sum_All': np.array([3, 3, 6]),
+                                   'c_count_P': np.array([1, 1, 2]),
+                                   'c_count_Q': np.array([1, 0, 1]),
+                                   'c_count_All': np.array([2, 1, 3])})
+        assert_df_equals(df_result, df_answer)
+
+    def test_pivot_table_margins(self):
+        df_result = df8.pivot_table(rows='a', columns='b', values='c', aggfunc='mean', margins=True)
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'b', 'All'], dtype=object),
+                                   'A': np.array([3, 8, 4.25]),
+                                   'B': np.array([6.5, 3, 4.75]),
+                                   'All': np.array([4.4, 14 / 3, 4.5])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df8.pivot_table(rows='a', values='c', aggfunc='median', margins=True)
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'b', 'All'], dtype=object),
+                                   'median': np.array([4, 5, 4.5])})
+        assert_df_equals(df_result, df_answer)
+
+    def test_groupby_agg(self):
+        df_result = df8.groupby(['a', 'b']).agg({'c': ['sum', 'min', 'mean']})
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'a', 'b', 'b'], dtype=object),
+                                   'b': np.array(['A', 'B', 'A', 'B'], dtype=object),
+                                   'c_sum': np.array([9, 13, 8, 6]),
+                                   'c_min': np.array([2, 6, 8, 1]),
+                                   'c_mean': np.array([3, 6.5, 8, 3])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df8.groupby('b').agg({'a': 'count', 'c': 'max'})
+        df_answer = pdc.DataFrame({'b': np.array(['A', 'B'], dtype=object),
+                                   'a': np.array([4, 4]),
+                                   'c': np.array([8, 7])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df8.groupby('a').size()
+        df_answer = pdc.DataFrame({'a': np.array(['a', 'b'], dtype=object),
+                                   'size': np.array([5, 3])})
+        assert_df_equals(df_result, df_answer)
+
+    def test_groupby_transforms(self):
+        df_temp = pdc.DataFrame({'k': np.array(list('ababba'), dtype=object),
+                                 'x': np.array([1, 2, np.nan, 4, 5, 1]),
+                                 's': np.array(['q', 'a', None, 'z', 'b', 'c'], dtype=object)})
+        nan = np.nan
+        grouped = df_temp.groupby('k')
+        assert_df_equals(grouped.cumsum(), pdc.DataFrame({'x': np.array([1, 2, nan, 6, 11, 2])}))
+        assert_df_equals(grouped.cummax(),
+                         pdc.DataFrame({'x': np.array([1, 2, nan, 4, 5, 1]),
+                                        's': np.array(['q', 'a', None, 'z', 'z', 'q'], dtype=object)}))
+        assert_df_equals(grouped.cummin(),
+                         pdc.DataFrame({'x': np.array([1, 2, nan, 2, 2, 1]),
+                                        's': np.array(['q', 'a', None, 'a', 'a', 'c'], dtype=object)}))
+        assert_df_equals(grouped.rank(),
+                         pdc.DataFrame({'x': np.array([1.5, 1, nan, 2, 3, 1.5]),
+                                        's': np.array([2, 1, nan, 3, 2, 1])}))
+        assert_df_equals(grouped.shift(-1),
+                         pdc.DataFrame({'x': np.array([nan, 4, 1, 5, nan, nan]),
+                                        's': np.array([None, 'z', 'c', 'b', None, None], dtype=object)}))
+        assert_df_equals(grouped.diff(), pdc.DataFrame({'x': np.array([nan, nan, nan, 2, 1, nan])}))
+        df_flag = pdc.DataFrame({'k': np.array(list('abab'), dtype=object),
+                                 'b': np.array([True, False, False, True])})
+        assert_df_equals(df_flag.groupby('k').diff(), pdc.DataFrame({'b': np.array([nan, nan, -1, 1])}))
+        assert_df_equals(grouped.transform('count'),
+                         pdc.DataFrame({'x': np.array([2, 3, 2, 3, 3, 2]),
+                                        's': np.array([2, 3, 2, 3, 3, 2])}))
+        assert_df_equals(grouped.transform(lambda values: values[::-1]),
+                         pdc.DataFrame({'x': np.array([1, 5, nan, 4, 2, 1]),
+                                        's': np.array(['c', 'b', None, 'z', 'a', 'q'], dtype=object)}))
+
+    def test_merge(self):
+        df_left = pdc.DataFrame({'id': np.array([1, 2, 2, 3]),
+                                 'name': np.array(['a', 'b', 'c', 'd']),
+                                 'x': np.array([1.5, 2.5, 3.5, 4.5])})
+        df_right = pdc.DataFrame({'id': np.array([2, 4, 1, 2]),
+                                  'x': np.array([10, 20, 30, 40])})
+        df_result = df_left.merge(df_right, on='id')
+        df_answer = pdc.DataFrame({'id': np.array([1, 2, 2, 2, 2]),
+                                   'name': np.array(['a', 'b', 'b', 'c', 'c']),
+                                   'x_x': np.array([1.5, 2.5, 2.5, 3.5, 3.5]),
+                                   'x_y': np.array([30, 10, 40, 10, 40])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = df_left.merge(df_right, on='id', how='outer')
+        df_answer = pdc.DataFrame({'id': np.array([1, 2, 2, 2, 2, 3, 4]),
+                                   'name': np.array(['a', 'b', 'b', 'c', 'c', 'd', None], dtype=object),
+                                   'x_x': np.array([1.5, 2.5, 2.5, 3.5, 3.5, 4.5, np.nan]),
+                                   'x_y': np.array([30, 10, 40, 10, 40, np.nan, 20])})
+        assert_df_equals(df_result, df_answer)
+
+        df_right = pdc.DataFrame({'id': np.array([2, 1]),
+                                  'name': np.array(['c', 'a']),
+                                  'y': np.array([True, False])})
+        df_result = df_left.merge(df_right, on=['id', 'name'], how='left')
+        df_answer = pdc.DataFrame({'id': np.array([1, 2, 2, 3]),
+                                   'name': np.array(['a', 'b', 'c', 'd']),
+                                   'x': np.array([1.5, 2.5, 3.5, 4.5]),
+                                   'y': np.array([False, None, True, None], dtype=object)})
+        assert_df_equals(df_result, df_answer)
+
+        with pytest.raises(KeyError):
+            df_left.merge(df_right, on='x')
+
+    def test_merge_sorted(self):
+        df_left = pdc.DataFrame({'id': np.array([3, 1, 2, 2, 5]),
+                                 'x': np.array([1, 2, 3, 4, 5])}).sort_values('id')
+        df_right = pdc.DataFrame({'id': np.array([4, 2, 1, 2]),
+                                  'y': np.array([1.5, 2.5, 3.5, 4.5])}).sort_values('id')
+        df_answer = pdc.DataFrame({'id': np.array([1, 2, 2, 2, 2, 3, 5, 4]),
+                                   'x': np.array([2, 3, 3, 4, 4, 1, 5, np.nan]),
+                                   'y': np.array([3.5, 2.5, 4.5, 2.5, 4.5, np.nan, np.nan, 1.5])})
+        assert_df_equals(df_left.merge(df_right, on='id', how='outer'), df_answer)
+
+        df_left['id'] = df_left['id'].values[:, 0]
+        assert df_left._sorted_by is None
+        assert_df_equals(df_left.merge(df_right, on='id', how='outer', presorted=True), df_answer)
+        assert_df_equals(df_left.merge(df_right, on='id', how='outer'), df_answer)
+
+    def test_merge_asof(self):
+        df_left = pdc.DataFrame({'day': np.array([3, 8, 1, 6]),
+                                 'emp': np.array(['a', 'a', 'b', 'b'])})
+        df_right = pdc.DataFrame({'day': np.array([7, 0, 2, 5, 1]),
+                                  'emp': np.array(['a', 'a', 'a', 'b', 'b']),
+                                  'rate': np.array([30, 10, 20, 15, 12])})
+        df_result = pdc.merge_asof(df_left, df_right, on='day', by='emp')
+        df_answer = pdc.DataFrame({'day': np.array([3, 8, 1, 6]),
+                                   'emp': np.array(['a', 'a', 'b', 'b']),
+                                   'rate': np.array([20, 30, 12, 15])})
+        assert_df_equals(df_result, df_answer)
+
+        df_result = pdc.merge_asof(df_left, df_right, on='day', by='emp', direction='forward')
+        df_answer['rate'] = np.array([30, np.nan, 12, np.nan])
+        assert_df_equals(df_result, df_answer)
+
+        df_result = pdc.merge_asof(df_left, df_right, on='day', direction='nearest', tolerance=1)
+        df_answer = pdc.DataFrame({'day': np.array([3, 8, 1, 6]),
+                                   'emp_x': np.array(['a', 'a', 'b', 'b']),
+                                   'emp_y': np.array(['a', 'a', 'b', 'b']),
+                                   'rate': np.array([20, 30, 12, 15])})
+        assert_df_equals(df_result, df_answer)
+
+    def test_concat(self):
+        df_a = pdc.DataFrame({'x': np.array([1, 2]), 's': np.array(['a', 'b'])})
+        df_b = pdc.DataFrame({'x': np.array([1.5]), 'f': np.array([True])})
+        df_c = pdc.DataFrame({'s': np.array(['z'])})
+        df_answer = pdc.DataFrame({'x': np.array([1, 2, 1.5, np.nan]),
+                                   's': np.array(['a', 'b', None, 'z'], dtype=object),
+                                   'f': np.array([None, None, True, None], dtype=object)})
+        assert_df_equals(pdc.concat([df_a, df_b, df_c]), df_answer)
+        assert_df_equals(pdc.concat([df_a, df_a]),
+                         pdc.DataFrame({'x': np.array([1, 2, 1, 2]),
+                                        's': np.array(['a', 'b', 'a', 'b'])}))
+
+        buffer = pdc.AppendBuffer(capacity=1)
+        for df in [df_a, df_b, df_c]:
+            buffer.append(df)
+        assert len(buffer) == 4
+        assert_df_equals(buffer.to_frame(), df_answer)
+
+        # booleans mixed with numbers are kept as objects, not cast to 1
+        df_int = pdc.DataFrame({'x': np.array([1, 2])})
+        df_bool = pdc.DataFrame({'x': np.array([True, False])})
+        buffer = pdc.AppendBuffer()
+        buffer.append(df_int)
+        buffer.append(df_bool)
+        for df_result in [pdc.concat([df_int, df_bool]), buffer.to_frame()]:
+            assert df_result._data['x'].dtype == object
+            assert df_result._data['x'].tolist() == [1, 2, True, False]
+            assert df_result._data['x'][2] is True
+
+        with pytest.raises(TypeError):
+            pdc.concat([])
+
 
 movie = np.array(['field of dreams', 'star wars'], dtype='O')
 num = np.array(['5.1', '6'], dtype='O')
@@ -806,6 +1376,78 @@ class TestStrings:
         answer = pdc.DataFrame({'movie': movie})
         assert_df_equals(result, answer)
 
+    def test_repeated_values(self):
+        df_temp = pdc.DataFrame({'dept': np.array(['hr', 'it', None, 'hr', 'it', 'hr'], dtype='O')})
+        result = df_temp.str.upper('dept')
+        answer = pdc.DataFrame({'dept': np.array(['HR', 'IT', None, 'HR', 'IT', 'HR'], dtype='O')})
+        assert_df_equals(result, answer)
+
+        df_temp.create_bitmap_index('dept')
+        result = df_temp.str.upper('dept')
+        assert_df_equals(result, answer)
+
+    def test_result_types(self):
+        result = df_string.str.len('movie')
+        assert result._data['movie'].dtype == np.dtype('int64')
+        assert df_string.str.isalpha('num')._data['num'].dtype == np.dtype('bool')
+
+        df_temp = pdc.DataFrame({'dept': np.array(['hr', None, 'sales'], dtype='O')})
+        result = df_temp.str.len('dept')
+        answer = pdc.DataFrame({'dept': np.array([2, np.nan, 5])})
+        assert_df_equals(result, answer)
+
+        result = df_temp.str.startswith('dept', 's')
+        answer = pdc.DataFrame({'dept': np.array([False, None, True], dtype='O')})
+        assert_df_equals(result, answer)
+
+    def test_regex(self):
+        df_temp = pdc.DataFrame({'email': np.array(['ann@x.com', 'bob@y.org', None, 'Cy z'], dtype='O')})
+        result = df_temp.str.contains('email', r'\.org$')
+        answer = pdc.DataFrame({'email': np.array([False, True, False, False])})
+        assert_df_equals(result, answer)
+        assert_df_equals(df_temp[result], pdc.DataFrame({'email': np.array(['bob@y.org'], dtype='O')}))
+
+        result = df_temp.str.contains('email', 'CY', case=False, regex=False)
+        answer = pdc.DataFrame({'email': np.array([False, False, False, True])})
+        assert_df_equals(result, answer)
+
+        result = df_temp.str.match('email', '[ab]')
+        answer = pdc.DataFrame({'email': np.array([True, True, False, False])})
+        assert_df_equals(result, answer)
+
+        result = df_temp.str.extract('email', r'(?P<user>\w+)@(\w+)')
+        answer = pdc.DataFrame({'user': np.array(['ann', 'bob', None, None], dtype='O'),
+                                'email_1': np.array(['x', 'y', None, None], dtype='O')})
+        assert_df_equals(result, answer)
+
+        result = df_temp.str.replace('email', r'@(\w+)', r'#\1', regex=True)
+        answer = pdc.DataFrame({'email': np.array(['ann#x.com', 'bob#y.org', None, 'Cy z'], dtype='O')})
+        assert_df_equals(result, answer)
+
+        result = df_temp.str.split('email', r'[@.]', regex=True)
+        answer = pdc.DataFrame({'email_0': np.array(['ann', 'bob', None, 'Cy z'], dtype='O'),
+                                'email_1': np.array(['x', 'y', None, None], dtype='O'),
+                                'email_2': np.array(['com', 'org', None, None], dtype='O')})
+        assert_df_equals(result, answer)
+
+        result = df_temp.str.split('email', r'[@.]', n=1, regex=True)
+        answer = pdc.DataFrame({'email_0': np.array(['ann', 'bob', None, 'Cy z'], dtype='O'),
+                                'email_1': np.array(['x.com', 'y.org', None, None], dtype='O')})
+        assert_df_equals(result, answer)
+
+        # n <= 0 splits at every match with or without a regex
+        df_words = pdc.DataFrame({'w': np.array(['a b c'], dtype='O')})
+        answer = pdc.DataFrame({'w_0': np.array(['a'], dtype='O'),
+                                'w_1': np.array(['b'], dtype='O'),
+                                'w_2': np.array(['c'], dtype='O')})
+        assert_df_equals(df_words.str.split('w', ' ', n=0), answer)
+        assert_df_equals(df_words.str.split('w', ' ', n=0, regex=True), answer)
+
+        result = df_temp.str.split('email', regex=True)
+        answer = pdc.DataFrame({'email_0': np.array(['ann@x.com', 'bob@y.org', None, 'Cy'], dtype='O'),
+                                'email_1': np.array([None, None, None, 'z'], dtype='O')})
+        assert_df_equals(result, answer)
+
 
 df_emp = pdc.read_csv('data/employee.csv')
 
@@ -817,6 +1459,47 @@ class TestReadCSV:
         answer = ['dept', 'race', 'gender', 'salary']
         assert result == answer
 
+    def test_read_csv_chunks(self):
+        chunks = list(pdc.read_csv('data/employee.csv', chunksize=500))
+        assert [len(chunk) for chunk in chunks] == [500, 500, 500, 35]
+        assert chunks[0].columns == df_emp.columns
+        assert sum(chunk['salary'].sum()._data['salary'][0] for chunk in chunks) == 86387875
+
+    def test_partial_agg(self, tmp_path):
+        agg = pdc.PartialAgg()
+        for chunk in pdc.read_csv('data/employee.csv', chunksize=400):
+            agg.update(chunk)
+        for aggfunc in ['sum', 'mean', 'var', 'std', 'min', 'max']:
+            assert_df_equals(agg.result(aggfunc), getattr(df_emp['salary'], aggfunc)())
+
+        agg1 = pdc.PartialAgg(by='race')
+        agg2 = pdc.PartialAgg(by='race')
+        for i, chunk in enumerate(pdc.read_csv('data/employee.csv', chunksize=300)):
+            [agg1, agg2][i % 2].update(chunk)
+        agg1.merge(agg2)
+        df_answer = df_emp.groupby('race').agg({'salary': 'var'})
+        assert_df_equals(agg1.result('var'), df_answer)
+        df_answer = df_emp.groupby('race').agg({'salary': 'count'})
+        assert_df_equals(agg1.result('count'), df_answer)
+
+        with pytest.raises(ValueError):
+            agg1.merge(pdc.PartialAgg(by='dept'))
+
+        # a blank field makes a column non-numeric in one chunk only
+        fn = tmp_path / 'blank.csv'
+        fn.write_text('k,v\n1,2\n1,3\n2,\n2,4\n')
+        agg = pdc.PartialAgg()
+        with pytest.raises(TypeError):
+            for chunk in pdc.read_csv(str(fn), chunksize=2):
+                agg.update(chunk)
+
+        # key dtypes widen when a later chunk has a missing key
+        agg = pdc.PartialAgg(by='k')
+        agg.update(pdc.DataFrame({'k': np.array([1, 2]), 'v': np.array([1, 2])}))
+        agg.update(pdc.DataFrame({'k': np.array([np.nan, 2]), 'v': np.array([3, 4])}))
+        df_answer = pdc.DataFrame({'k': np.array([1, 2, np.nan]), 'v': np.array([1, 6, 3])})
+        assert_df_equals(agg.result('sum'), df_answer)
+
     def test_data_types(self):
         df_result = df_emp.dtypes
         cols = np.array(['dept', 'race', 'gender', 'salary'], dtype='O')